@@ -5,6 +5,13 @@ CREATE TABLE IF NOT EXISTS public.raw_listing (
     raw_details TEXT,
     raw_price TEXT,
     status VARCHAR(50),
+    -- details spider currently crawling the listing and until when, see claim_listing_ids
+    lease_owner TEXT,
+    lease_expires_at TIMESTAMPTZ,
+    -- md5 of every raw section, parsers and the listing pipeline skip unchanged sections
+    summary_hash CHAR(32) GENERATED ALWAYS AS (md5(raw_summary)) STORED,
+    details_hash CHAR(32) GENERATED ALWAYS AS (md5(raw_details)) STORED,
+    price_hash CHAR(32) GENERATED ALWAYS AS (md5(raw_price)) STORED,
     created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
 );
@@ -15,4 +22,6 @@ CREATE INDEX IF NOT EXISTS idx_raw_listing_created_at ON public.raw_listing (cre
 -- Add index for LIKE queries on raw_summary, raw_details, and raw_price
 CREATE INDEX IF NOT EXISTS idx_raw_listing_summary_like ON public.raw_listing (raw_summary);
 CREATE INDEX IF NOT EXISTS idx_raw_listing_details_like ON public.raw_listing (raw_details);
-CREATE INDEX IF NOT EXISTS idx_raw_listing_price_like ON public.raw_listing (raw_price);
\ No newline at end of file
+CREATE INDEX IF NOT EXISTS idx_raw_listing_price_like ON public.raw_listing (raw_price);
+CREATE INDEX IF NOT EXISTS idx_raw_listing_updated_at ON public.raw_listing (updated_at);
+CREATE INDEX IF NOT EXISTS idx_raw_listing_status_lease ON public.raw_listing (status, lease_expires_at);
\ No newline at end of file
@@ -6,6 +6,7 @@ CREATE TABLE IF NOT EXISTS public.car (
     engine_cc    NUMERIC,
     power_hp     NUMERIC,
     description  TEXT,
+    raw_hash     CHAR(32),
     created_at   TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
     updated_at   TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
     CONSTRAINT car_pkey PRIMARY KEY (id, make)
@@ -11,6 +11,7 @@ CREATE TABLE public.details (
     is_featured BOOLEAN,
     is_verified BOOLEAN,
     is_stamped BOOLEAN,
+    raw_hash CHAR(32),
     created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
     CONSTRAINT details_pkey PRIMARY KEY (id, "year"),
@@ -3,6 +3,7 @@ CREATE TABLE public.price (
     amount      FLOAT,
     currency    VARCHAR(20) NOT NULL,
     segment     VARCHAR(100),
+    raw_hash    CHAR(32),
     created_at  TIMESTAMPTZ   DEFAULT CURRENT_TIMESTAMP,
     updated_at  TIMESTAMPTZ   DEFAULT CURRENT_TIMESTAMP,
     CONSTRAINT price_pkey PRIMARY KEY (id, currency),
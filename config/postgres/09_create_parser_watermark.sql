@@ -0,0 +1,6 @@
+CREATE TABLE IF NOT EXISTS public.parser_watermark (
+    parser_name VARCHAR(100) PRIMARY KEY,
+    watermark TIMESTAMPTZ NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
+);
@@ -0,0 +1,9 @@
+CREATE TABLE IF NOT EXISTS public.normalization_alias (
+    table_name VARCHAR(100) NOT NULL,
+    column_name VARCHAR(100) NOT NULL,
+    raw_value TEXT NOT NULL,
+    canonical_value TEXT NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT normalization_alias_pkey PRIMARY KEY (table_name, column_name, raw_value)
+);
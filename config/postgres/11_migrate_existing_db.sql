@@ -0,0 +1,42 @@
+-- Brings a database created by older versions of the files above up to date, in place.
+-- Every statement is idempotent, so on a fresh database this file does nothing and it can
+-- be run again at any time:
+--   docker exec -i <postgres container> psql -U <user> -d <db> < config/postgres/11_migrate_existing_db.sql
+
+-- Details spider leases, see claim_listing_ids
+ALTER TABLE public.raw_listing ADD COLUMN IF NOT EXISTS lease_owner TEXT;
+ALTER TABLE public.raw_listing ADD COLUMN IF NOT EXISTS lease_expires_at TIMESTAMPTZ;
+
+-- Hashes of the raw sections, computed for the existing rows when the columns are added
+ALTER TABLE public.raw_listing
+    ADD COLUMN IF NOT EXISTS summary_hash CHAR(32) GENERATED ALWAYS AS (md5(raw_summary)) STORED;
+ALTER TABLE public.raw_listing
+    ADD COLUMN IF NOT EXISTS details_hash CHAR(32) GENERATED ALWAYS AS (md5(raw_details)) STORED;
+ALTER TABLE public.raw_listing
+    ADD COLUMN IF NOT EXISTS price_hash CHAR(32) GENERATED ALWAYS AS (md5(raw_price)) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_raw_listing_updated_at ON public.raw_listing (updated_at);
+CREATE INDEX IF NOT EXISTS idx_raw_listing_status_lease ON public.raw_listing (status, lease_expires_at);
+
+-- Hash of the raw section a parsed row came from. Rows parsed before stay NULL, so the
+-- next parser run parses them once more and fills it in
+ALTER TABLE public.car ADD COLUMN IF NOT EXISTS raw_hash CHAR(32);
+ALTER TABLE public.details ADD COLUMN IF NOT EXISTS raw_hash CHAR(32);
+ALTER TABLE public.price ADD COLUMN IF NOT EXISTS raw_hash CHAR(32);
+
+CREATE TABLE IF NOT EXISTS public.parser_watermark (
+    parser_name VARCHAR(100) PRIMARY KEY,
+    watermark TIMESTAMPTZ NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS public.normalization_alias (
+    table_name VARCHAR(100) NOT NULL,
+    column_name VARCHAR(100) NOT NULL,
+    raw_value TEXT NOT NULL,
+    canonical_value TEXT NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT normalization_alias_pkey PRIMARY KEY (table_name, column_name, raw_value)
+);
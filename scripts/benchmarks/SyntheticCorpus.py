@@ -0,0 +1,193 @@
+import random
+from typing import Iterator, Optional
+
+import pandas as pd
+
+from scripts.shared.Models import RawListing
+
+
+class SyntheticCorpus:
+    """
+    Generates raw_listing rows shaped like the otomoto listing sections the spider saves,
+    so the parsers can be measured without a populated database.
+
+    Rows are reproducible for a given seed and are generated batch by batch, so millions
+    of rows never have to sit in memory at once.
+
+    Example:
+        >>> corpus = SyntheticCorpus(seed=7)
+        >>> df = next(corpus.batches(rows=3, batch_size=3))
+        >>> list(df.columns)
+        ['id', 'raw_summary', 'raw_details', 'raw_price']
+    """
+
+    MAKES = {
+        "BMW": ["Seria 3", "Seria 5", "X5", "X 3"],
+        "Audi": ["A4", "A6", "Q5", "A3"],
+        "Volkswagen": ["Golf", "Passat", "Tiguan", "Polo"],
+        "Land Rover": ["Range Rover", "Discovery", "Defender"],
+        "Alfa Romeo": ["Giulia", "Stelvio", "Giulietta"],
+        "Mercedes-Benz": ["Klasa C", "Klasa E", "GLC", "CLA"],
+        "Škoda": ["Octavia", "Superb", "Fabia", "Kodiaq"],
+        "Citroën": ["C3", "C4", "C5 Aircross", "Berlingo"],
+        "Kia": ["Ceed", "Sportage", "Picanto", "Niro"],
+        "Hyundai": ["I 30", "Tucson", "I 20", "Kona"],
+        "Opel": ["Astra", "Corsa", "Insignia", "Mokka"],
+        "Toyota": ["Corolla", "Yaris", "RAV4", "C-HR"],
+    }
+    # How the same make shows up when typed differently by sellers
+    MAKE_SPELLINGS = {
+        "Mercedes-Benz": ["Mercedes Benz", "MERCEDES-BENZ"],
+        "Škoda": ["Skoda", "SKODA"],
+        "Citroën": ["Citroen"],
+        "Volkswagen": ["VW", "volkswagen"],
+    }
+    VARIANTS = [
+        "1.2 TCe Limited EDC",
+        "2.0 TDI",
+        "1.6 HDi (Business)",
+        "2.0 T-GDI+",
+        "1.4 TSI DSG",
+        "3.0d xDrive",
+        "1.5 dCi*",
+        "Sport [M]",
+        "1.8 Hybrid Comfort",
+        "",
+    ]
+    DESCRIPTIONS = ["Lift", "FV23", "Salon PL", "Bezwypadkowy", "Serwisowany w ASO", ""]
+    FUEL_TYPES = ["Benzyna", "Diesel", "Benzyna+LPG", "Hybryda", "Elektryczny"]
+    GEARBOXES = ["Manualna", "Automatyczna"]
+    LOCATIONS = {
+        "Mazowieckie": ["Warszawa", "Radom", "Płock"],
+        "Małopolskie": ["Kraków", "Nowy Sącz", "Tarnów"],
+        "Łódzkie": ["Łódź", "Piotrków Trybunalski"],
+        "Pomorskie": ["Gdańsk", "Gdynia", "Słupsk"],
+        "Wielkopolskie": ["Poznań", "Kalisz"],
+        "Lubuskie": ["Zielona Góra", "Gorzów Wielkopolski"],
+    }
+    SELLERS = ["Prywatny sprzedawca", "Firma", "Dealer Zobacz ogłoszenia"]
+    FINANCING = ["od 1 200 zł", "kredyt (RRSO 9%)", ""]
+    PRICE_LABELS = ["Cena Brutto", "Cena Netto", "Do negocjacji", ""]
+
+    EMPTY_SECTION_RATE = 0.03
+    TITLE_ONLY_RATE = 0.05
+    MISSPELLED_MAKE_RATE = 0.1
+
+    def __init__(self, seed: int = 0):
+        self.random = random.Random(seed)
+
+    def batches(
+        self, rows: int, batch_size: int, columns: Optional[list[str]] = None
+    ) -> Iterator[pd.DataFrame]:
+        """Yields frames of at most batch_size rows until rows rows were generated."""
+        start_id = 1
+        while start_id <= rows:
+            size = min(batch_size, rows - start_id + 1)
+            yield self.frame(size, start_id, columns)
+            start_id += size
+
+    def frame(
+        self, rows: int, start_id: int = 1, columns: Optional[list[str]] = None
+    ) -> pd.DataFrame:
+        """
+        Returns rows raw_listing rows with ids from start_id, as read by the parsers.
+
+        Args:
+            columns (list, optional): raw section columns to generate, all three by default
+        """
+        sections = {
+            RawListing.raw_summary.name: self.summary,
+            RawListing.raw_details.name: self.details,
+            RawListing.raw_price.name: self.price,
+        }
+        if columns is not None:
+            sections = {name: sections[name] for name in columns}
+
+        df = pd.DataFrame({RawListing.id.name: range(start_id, start_id + rows)})
+        for name, generate in sections.items():
+            df[name] = [generate() for _ in range(rows)]
+
+        return df
+
+    def existing_values(self, column_name: str) -> dict:
+        """Canonical car values with frequencies, as StringNormalizer reads them from the db."""
+        if column_name == "make":
+            return {make: 1000 - rank for rank, make in enumerate(self.MAKES)}
+
+        if column_name == "model":
+            models = [model for models in self.MAKES.values() for model in models]
+            return {model: 500 - rank for rank, model in enumerate(models)}
+
+        return {}
+
+    def summary(self):
+        r = self.random
+        if r.random() < self.EMPTY_SECTION_RATE:
+            return None
+
+        make = r.choice(list(self.MAKES))
+        model = r.choice(self.MAKES[make])
+        variant = r.choice(self.VARIANTS)
+
+        if make in self.MAKE_SPELLINGS and r.random() < self.MISSPELLED_MAKE_RATE:
+            make = r.choice(self.MAKE_SPELLINGS[make])
+
+        title = f"{make} {model} {variant}".strip()
+        if r.random() < self.TITLE_ONLY_RATE:
+            return title
+
+        description = f"{title} {r.choice(self.DESCRIPTIONS)}".strip()
+        engine_cc = f"{r.randint(900, 5000)} cm3"
+        power_hp = f"{r.randint(60, 600)} KM"
+
+        return " ".join([title, engine_cc, "•", power_hp, "•", description])
+
+    def details(self):
+        r = self.random
+        if r.random() < self.EMPTY_SECTION_RATE:
+            return None
+
+        voivodeship = r.choice(list(self.LOCATIONS))
+        parts = []
+        if r.random() < 0.2:
+            parts.append("Podbite")
+        if r.random() < 0.2:
+            parts.append("Wyróżnione")
+        if r.random() < 0.3:
+            parts.append("Zweryfikowane dane")
+
+        parts += [
+            f"mileage {r.randint(0, 400)} {r.randint(0, 999):03d} km",
+            f"fuel_type {r.choice(self.FUEL_TYPES)}",
+            f"gearbox {r.choice(self.GEARBOXES)}",
+            f"year {r.randint(1970, 2025)}",
+            f"{r.choice(self.LOCATIONS[voivodeship])} ({voivodeship})",
+        ]
+        if r.random() < 0.5:
+            parts.append(f"Opublikowano {r.randint(1, 30)} dni temu")
+
+        parts.append(r.choice(self.SELLERS))
+        if r.random() < 0.3:
+            parts.append(f"Usługi finansowe Leasing {r.choice(self.FINANCING)}".strip())
+
+        return " ".join(parts)
+
+    def price(self):
+        r = self.random
+        if r.random() < self.EMPTY_SECTION_RATE:
+            return None
+
+        if r.random() < 0.8:
+            amount = f"{r.randint(1, 999)} {r.randint(0, 999):03d}"
+        else:
+            amount = str(r.randint(100, 999))
+
+        parts = [amount, r.choice(["PLN", "PLN", "EUR"]), r.choice(self.PRICE_LABELS)]
+        if r.random() < 0.5:
+            parts.insert(0, "ad link")
+        if r.random() < 0.5:
+            parts.append("Sprawdź możliwości finansowania")
+        if r.random() < 0.2:
+            parts.append(str(r.randint(1990, 2025)))
+
+        return " ".join(part for part in parts if part)
@@ -0,0 +1,142 @@
+import argparse
+import random
+import string
+import time
+from difflib import SequenceMatcher
+from typing import Optional
+
+from scripts.benchmarks.SyntheticCorpus import SyntheticCorpus
+from scripts.normalizers.TrigramIndex import TrigramIndex
+from scripts.utils.LoggerUtil import Logger
+
+SCRIPT_NAME = "benchmarkFuzzyIndex"
+log = Logger(SCRIPT_NAME)
+
+
+def known_values(count: int, seed: int) -> list[str]:
+    """Distinct model/variant-like values, e.g. "Golf 1.4 TSI DSG Comfortline K4X"."""
+    r = random.Random(seed)
+    models = [model for models in SyntheticCorpus.MAKES.values() for model in models]
+    trims = ["Comfortline", "Highline", "Sport", "Business", "Premium", "Elegance", "Active"]
+
+    values = {}
+    while len(values) < count:
+        code = "".join(r.choices(string.ascii_uppercase + string.digits, k=r.randint(2, 5)))
+        parts = [r.choice(models), r.choice(SyntheticCorpus.VARIANTS), r.choice(trims), code]
+        values[" ".join(part for part in parts if part)] = None
+
+    return list(values)
+
+
+def misspell(text: str, r: random.Random) -> str:
+    """text with one or two characters replaced or dropped, as sellers type them."""
+    chars = list(text)
+    for _ in range(r.randint(1, 2)):
+        position = r.randrange(len(chars))
+        if r.random() < 0.5:
+            chars[position] = r.choice(string.ascii_lowercase)
+        else:
+            del chars[position]
+
+    return "".join(chars)
+
+
+def brute_force_match(values: list[str], text: str, threshold: float) -> Optional[str]:
+    """The full scan normalize_with_similarity_threshold used to do for every string."""
+    best_match = None
+    best_score = 0
+    for value in values:
+        score = SequenceMatcher(None, text.lower(), value.lower()).ratio()
+        if score > best_score and score >= threshold:
+            best_score = score
+            best_match = value
+
+    return best_match
+
+
+def run_benchmark(
+    values_count: int, queries: int, threshold: float, seed: int, brute_force_sample: int
+) -> dict:
+    r = random.Random(seed)
+    values = known_values(values_count, seed)
+    texts = [misspell(r.choice(values), r) for _ in range(queries)]
+
+    start = time.perf_counter()
+    index = TrigramIndex(values)
+    build_seconds = time.perf_counter() - start
+
+    # The first lookup builds the numpy postings, it is not counted
+    index.best_match(texts[0], threshold)
+
+    start = time.perf_counter()
+    matches = [index.best_match(text, threshold) for text in texts]
+    lookup_seconds = time.perf_counter() - start
+
+    sample = texts[:brute_force_sample]
+    start = time.perf_counter()
+    expected = [brute_force_match(values, text, threshold) for text in sample]
+    brute_force_seconds = time.perf_counter() - start
+
+    return {
+        "values": len(values),
+        "build_seconds": build_seconds,
+        "lookup_ms": lookup_seconds / len(texts) * 1000,
+        "matched": sum(match is not None for match in matches) / len(texts),
+        "brute_force_ms": brute_force_seconds / len(sample) * 1000 if sample else None,
+        "agreement": (
+            sum(a == b for a, b in zip(matches[: len(sample)], expected, strict=True))
+            / len(sample)
+            if sample
+            else None
+        ),
+    }
+
+
+if __name__ == "__main__":
+    arguments = argparse.ArgumentParser(description="TrigramIndex fuzzy lookup benchmark")
+    arguments.add_argument(
+        "--values",
+        type=int,
+        default=100_000,
+        help="Number of known values in the index (default: 100000)",
+    )
+    arguments.add_argument(
+        "--queries",
+        type=int,
+        default=2000,
+        help="Number of misspelled strings looked up (default: 2000)",
+    )
+    arguments.add_argument(
+        "--threshold",
+        type=float,
+        default=0.8,
+        help="Similarity threshold of the lookups (default: 0.8)",
+    )
+    arguments.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="Seed of the generated values and misspellings (default: 0)",
+    )
+    arguments.add_argument(
+        "--brute-force-sample",
+        type=int,
+        default=10,
+        help="Lookups also run as a full SequenceMatcher scan, to compare (default: 10)",
+    )
+    args = arguments.parse_args()
+
+    result = run_benchmark(
+        args.values, args.queries, args.threshold, args.seed, args.brute_force_sample
+    )
+
+    log.info(f"Index of {result['values']} values built in {result['build_seconds']:.2f} s")
+    log.info(
+        f"{result['lookup_ms']:.3f} ms per lookup,"
+        f" {result['matched']:.1%} of the strings matched at threshold {args.threshold}"
+    )
+    if result["brute_force_ms"] is not None:
+        log.info(
+            f"Full scan: {result['brute_force_ms']:.1f} ms per lookup,"
+            f" same match as the index for {result['agreement']:.0%} of the sample"
+        )
@@ -0,0 +1,172 @@
+import argparse
+import time
+import tracemalloc
+
+from scripts.benchmarks.SyntheticCorpus import SyntheticCorpus
+from scripts.normalizers.StringNormalizer import StringNormalizer
+from scripts.parsers.AbstractParser import AbstractParser
+from scripts.parsers.DetailsParser import DetailsParser
+from scripts.parsers.PriceParser import PriceParser
+from scripts.parsers.SummaryParser import SummaryParser
+from scripts.shared.Models import RawListing
+from scripts.utils.LoggerUtil import Logger
+
+SCRIPT_NAME = "benchmarkParsers"
+log = Logger(SCRIPT_NAME)
+
+PARSERS = {
+    "summary": (SummaryParser, RawListing.raw_summary),
+    "details": (DetailsParser, RawListing.raw_details),
+    "price": (PriceParser, RawListing.raw_price),
+}
+
+
+class CorpusStringNormalizer(StringNormalizer):
+    """StringNormalizer that takes the existing car values from the corpus, not the db."""
+
+    def __init__(self, corpus: SyntheticCorpus):
+        super().__init__(persist_aliases=False)
+        self.corpus = corpus
+
+    def _get_existing_values(self, table, column_name: str) -> dict:
+        return self.corpus.existing_values(column_name)
+
+
+def create_parser(
+    parser_type: str, corpus: SyntheticCorpus, vectorized: bool, memo_size: int = 0
+) -> AbstractParser:
+    parser_cls, _ = PARSERS[parser_type]
+    parser = parser_cls(vectorized=vectorized, memo_size=memo_size)
+
+    if hasattr(parser, "s_normal"):
+        parser.s_normal = CorpusStringNormalizer(corpus)
+
+    return parser
+
+
+def benchmark_parser(
+    parser_type: str,
+    rows: int,
+    batch_size: int,
+    seed: int,
+    vectorized: bool,
+    memo_size: int = 0,
+) -> dict:
+    """
+    Runs one parser's _parse over rows synthetic rows in batches of batch_size.
+
+    Only _parse is timed, generating the corpus is not. Peak memory is the largest
+    allocation tracemalloc sees while one extra batch is parsed, it is measured apart
+    from the timed run because tracing slows every allocation down.
+    """
+    _, raw_column = PARSERS[parser_type]
+    columns = [raw_column.name]
+    corpus = SyntheticCorpus(seed)
+    parser = create_parser(parser_type, corpus, vectorized, memo_size)
+
+    parsed_rows = 0
+    seconds = 0.0
+    for df in corpus.batches(rows, batch_size, columns):
+        start = time.perf_counter()
+        parser._parse(df)
+        seconds += time.perf_counter() - start
+        parsed_rows += len(df)
+
+    memo_hits, memo_misses = parser._memo_stats()
+
+    df = corpus.frame(min(batch_size, rows), rows + 1, columns)
+    tracemalloc.start()
+    try:
+        parser._parse(df)
+        _, peak_bytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "parser": parser.__class__.__name__,
+        "rows": parsed_rows,
+        "seconds": seconds,
+        "rows_per_sec": parsed_rows / seconds if seconds else float("inf"),
+        "peak_mb": peak_bytes / 1024**2,
+        "memo_hit_rate": memo_hits / (memo_hits + memo_misses) if memo_size else None,
+    }
+
+
+def run_benchmarks(
+    parser_types: list[str],
+    rows: int,
+    batch_size: int,
+    seed: int,
+    vectorized: bool,
+    memo_size: int = 0,
+) -> list[dict]:
+    log.info(
+        f"Benchmarking {', '.join(parser_types)} on {rows} synthetic rows"
+        f" in batches of {batch_size} ({'vectorized' if vectorized else 'row-wise'})"
+    )
+
+    results = []
+    for parser_type in parser_types:
+        result = benchmark_parser(parser_type, rows, batch_size, seed, vectorized, memo_size)
+        memo = ""
+        if result["memo_hit_rate"] is not None:
+            memo = f", {result['memo_hit_rate']:.1%} memo hit rate"
+
+        log.info(
+            f"{result['parser']}: {result['rows_per_sec']:,.0f} rows/sec"
+            f" ({result['rows']} rows in {result['seconds']:.2f} s),"
+            f" peak {result['peak_mb']:.1f} MB per batch{memo}"
+        )
+        results.append(result)
+
+    return results
+
+
+if __name__ == "__main__":
+    arguments = argparse.ArgumentParser(description="Parser benchmark on a synthetic corpus")
+    arguments.add_argument(
+        "--rows",
+        type=int,
+        default=10_000,
+        help="Number of synthetic raw_listing rows per parser (default: 10000)",
+    )
+    arguments.add_argument(
+        "--batch-size",
+        type=int,
+        default=1000,
+        help="Number of rows passed to _parse at once (default: 1000)",
+    )
+    arguments.add_argument(
+        "--parser-type",
+        type=str,
+        action="append",
+        choices=list(PARSERS),
+        help="Parser to benchmark, can be repeated (default: all three)",
+    )
+    arguments.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="Seed of the synthetic corpus (default: 0)",
+    )
+    arguments.add_argument(
+        "--row-wise",
+        action="store_true",
+        help="Benchmark the row by row df.apply extraction instead of the vectorized one."
+    )
+    arguments.add_argument(
+        "--memo-size",
+        type=int,
+        default=0,
+        help="Memo cache size of the parsers (default: 0, off)",
+    )
+    args = arguments.parse_args()
+
+    run_benchmarks(
+        args.parser_type or list(PARSERS),
+        args.rows,
+        args.batch_size,
+        args.seed,
+        vectorized=not args.row_wise,
+        memo_size=args.memo_size,
+    )
@@ -0,0 +1,238 @@
+import argparse
+import datetime
+import glob
+import os
+import uuid
+from typing import Iterator, Optional
+from urllib.parse import unquote
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from sqlalchemy import DateTime, Select, func, select
+
+from scripts.shared.Models import Car, Details, Price
+from scripts.utils.ArrowUtil import arrow_schema
+from scripts.utils.DbUtil import DbConnector
+from scripts.utils.LoggerUtil import Logger
+
+SCRIPT_NAME = "exportParquet"
+log = Logger(SCRIPT_NAME)
+
+WATERMARK_FILE = "_watermark"
+# updated_at is set by the writers, a row may commit a while after that time. The export
+# stops this far before now() and the next one reads this far before the watermark again
+WATERMARK_LAG = datetime.timedelta(minutes=5)
+PARTITIONING = ds.partitioning(
+    pa.schema([("make", pa.string()), ("year", pa.int32())]), flavor="hive"
+)
+WRITE_OPTIONS = ds.ParquetFileFormat().make_write_options(compression="zstd")
+
+
+def build_export_query(since: Optional[datetime.datetime], until: datetime.datetime) -> Select:
+    """
+    Joined car, details and price rows changed in (since, until], ordered by partition so
+    every batch touches as few partitions as possible. A row's updated_at is the newest of
+    its three parts, a listing without a price is exported with empty price columns.
+    """
+    updated_at = func.greatest(
+        Car.updated_at, Details.updated_at, Price.updated_at, type_=DateTime(True)
+    )
+    query = (
+        select(
+            Car.id,
+            Car.make,
+            Car.model,
+            Car.variant,
+            Car.engine_cc,
+            Car.power_hp,
+            Car.description,
+            Details.year,
+            Details.mileage,
+            Details.fuel_type,
+            Details.gearbox_type,
+            Details.city,
+            Details.voivodeship,
+            Details.seller_type,
+            Details.seller_info,
+            Details.is_featured,
+            Details.is_verified,
+            Details.is_stamped,
+            Price.amount,
+            Price.currency,
+            Price.segment,
+            updated_at.label("updated_at"),
+        )
+        .select_from(Car)
+        .join(Details, Details.id == Car.id)
+        .outerjoin(Price, Price.id == Car.id)
+        .where(updated_at <= until)
+        .order_by(Car.make, Details.year, Car.id)
+    )
+
+    if since is not None:
+        query = query.where(updated_at > since)
+
+    return query
+
+
+def stream_export(query: Select, batch_size: int) -> Iterator[pa.Table]:
+    """Yields the query's rows as Arrow tables, read from one server-side cursor."""
+    schema = arrow_schema(query.selected_columns)
+
+    with DbConnector().get_engine().connect() as conn:
+        conn = conn.execution_options(yield_per=batch_size)
+        for df in pd.read_sql_query(sql=query, con=conn, chunksize=batch_size):
+            if not df.empty:
+                yield pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+
+
+def read_watermark(output_dir: str) -> Optional[datetime.datetime]:
+    path = os.path.join(output_dir, WATERMARK_FILE)
+    if not os.path.exists(path):
+        return None
+
+    with open(path) as f:
+        return datetime.datetime.fromisoformat(f.read().strip())
+
+
+def write_watermark(output_dir: str, watermark: datetime.datetime):
+    with open(os.path.join(output_dir, WATERMARK_FILE), "w") as f:
+        f.write(watermark.isoformat())
+
+
+def list_data_files(output_dir: str) -> list[str]:
+    return glob.glob(os.path.join(output_dir, "make=*", "year=*", "*.parquet"))
+
+
+def remove_files(files: list[str]):
+    for path in files:
+        os.remove(path)
+        _remove_empty_partition(os.path.dirname(path))
+
+
+def partition_of(path: str) -> tuple[str, str]:
+    """(make, year) of a data file, from its make=.../year=... directories."""
+    year_directory = os.path.dirname(path)
+    make_directory = os.path.dirname(year_directory)
+    return (
+        unquote(os.path.basename(make_directory).removeprefix("make=")),
+        unquote(os.path.basename(year_directory).removeprefix("year=")),
+    )
+
+
+def partitions_of(table: pa.Table) -> set[tuple[str, str]]:
+    """The (make, year) partitions the rows of table are written to."""
+    keys = table.select(["make", "year"]).group_by(["make", "year"]).aggregate([])
+    return {(str(row["make"]), str(row["year"])) for row in keys.to_pylist()}
+
+
+def remove_stale_rows(files: list[str], ids: pa.Array) -> int:
+    """
+    Drops the rows with the given ids from files written by earlier runs, as they were
+    exported again. Returns the number of rows dropped.
+    """
+    dropped = 0
+    for path in files:
+        stale = pc.is_in(pq.read_table(path, columns=["id"])["id"], value_set=ids)
+        stale_rows = pc.sum(stale).as_py() or 0
+        if not stale_rows:
+            continue
+
+        table = pq.read_table(path)
+        dropped += stale_rows
+        if stale_rows == table.num_rows:
+            remove_files([path])
+        else:
+            pq.write_table(table.filter(pc.invert(stale)), path, compression="zstd")
+
+    return dropped
+
+
+def _remove_empty_partition(directory: str):
+    while os.path.basename(directory).startswith(("make=", "year=")) and not os.listdir(directory):
+        os.rmdir(directory)
+        directory = os.path.dirname(directory)
+
+
+def export_parquet(output_dir: str, batch_size: int, full: bool = False) -> int:
+    """
+    Exports the joined car, details and price tables to output_dir as Parquet, partitioned
+    by make and year (output_dir/make=BMW/year=2019/part-....parquet).
+
+    Runs are incremental: only rows updated since the watermark of the previous export,
+    minus WATERMARK_LAG, are read, and their older copies are removed from the files they
+    were in. Make and year are part of the primary keys of car and details, so the older
+    copy of a row is always in the row's own partition and only those partitions are read.
+    Without a watermark, or with full, everything is exported and the files of earlier
+    runs are removed once the new ones are written. Returns the number of exported rows.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    since = None if full else read_watermark(output_dir)
+    with DbConnector().get_session() as session:
+        until = session.execute(select(func.now() - WATERMARK_LAG)).scalar()
+    previous_files = list_data_files(output_dir)
+
+    log.info(
+        f"Exporting rows updated since {since} to {output_dir}"
+        if since
+        else f"Exporting all rows to {output_dir}"
+    )
+
+    run_id = uuid.uuid4().hex[:8]
+    exported = 0
+    ids = []
+    partitions = set()
+    query_since = None if since is None else since - WATERMARK_LAG
+    batches = stream_export(build_export_query(query_since, until), batch_size)
+    for batch_number, table in enumerate(batches):
+        ds.write_dataset(
+            table,
+            output_dir,
+            format="parquet",
+            partitioning=PARTITIONING,
+            basename_template=f"part-{run_id}-{batch_number}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+            file_options=WRITE_OPTIONS,
+        )
+        exported += table.num_rows
+        ids.append(table["id"].combine_chunks())
+        partitions |= partitions_of(table)
+        log.info(f"Exported {exported} rows")
+
+    if since is None:
+        remove_files(previous_files)
+    elif ids:
+        changed_files = [path for path in previous_files if partition_of(path) in partitions]
+        dropped = remove_stale_rows(changed_files, pa.concat_arrays(ids))
+        log.info(f"Removed {dropped} outdated rows from earlier exports")
+
+    write_watermark(output_dir, until)
+    log.info(f"Export finished, {exported} rows, watermark moved to {until}")
+    return exported
+
+
+if __name__ == "__main__":
+    arguments = argparse.ArgumentParser(description="Parquet export of the parsed tables")
+    arguments.add_argument(
+        "--output-dir",
+        type=str,
+        default="exports/listings",
+        help="Directory of the partitioned Parquet dataset (default: exports/listings)",
+    )
+    arguments.add_argument(
+        "--batch-size",
+        type=int,
+        default=50_000,
+        help="Number of rows read from postgres per batch (default: 50000)",
+    )
+    arguments.add_argument(
+        "--full",
+        action="store_true",
+        help="Export every row again instead of the rows updated since the last export.",
+    )
+    args = arguments.parse_args()
+
+    export_parquet(args.output_dir, args.batch_size, args.full)
@@ -1,8 +1,13 @@
 import argparse
+import cProfile
+from typing import Optional
 
 from tqdm import tqdm
 
+from scripts.parsers.CombinedParser import CombinedParser
 from scripts.parsers.DetailsParser import DetailsParser
+from scripts.parsers.ParquetSink import ParquetSink
+from scripts.parsers.ParquetSource import ParquetSource
 from scripts.parsers.PriceParser import PriceParser
 from scripts.parsers.SummaryParser import SummaryParser
 from scripts.utils.LoggerUtil import Logger
@@ -10,26 +15,73 @@ from scripts.utils.LoggerUtil import Logger
 PARSER_DETAILS = "details"
 PARSER_SUMMARY = "summary"
 PARSER_PRICE = "price"
+PARSER_ALL = "all"
 
+PARSERS = {
+    PARSER_SUMMARY: SummaryParser,
+    PARSER_DETAILS: DetailsParser,
+    PARSER_PRICE: PriceParser,
+    PARSER_ALL: CombinedParser,
+}
 
-def run_car_data_parser(batch_size: int, parser_type: str, only_missing: bool):
+
+def run_car_data_parser(
+    batch_size: int,
+    parser_type: str,
+    only_missing: bool,
+    vectorized: bool = True,
+    workers: int = 1,
+    streaming: bool = False,
+    incremental: bool = False,
+    memo_size: int = 0,
+    prefetch: int = 0,
+    profile_path: Optional[str] = None,
+    source_path: Optional[str] = None,
+    sink_dir: Optional[str] = None,
+    reparse: bool = False,
+):
     """
     Initializes the parser, runs the data extraction and saving process,
     and displays progress with a TQDM bar.
+
+    With profile_path set, the run is recorded with cProfile and dumped there (pstats
+    format, e.g. for snakeviz or flameprof), and the parser's per-step timings are logged
+    when it ends. With workers, only the main process is profiled, the step timings
+    include the workers.
+
+    With source_path set, raw_listing rows are read from that Parquet/Arrow file or
+    directory instead of the database. With sink_dir set, parsed frames are written there
+    as Parquet (car.parquet, details.parquet, price.parquet) instead of being upserted.
+
+    Rows whose raw section is unchanged since it was last parsed are skipped in every
+    mode, reparse parses them again.
     """
     logger = Logger(f"{parser_type.title()}DataParser")
-    if parser_type == PARSER_SUMMARY:
-        parser = SummaryParser()
-    elif parser_type == PARSER_DETAILS:
-        parser = DetailsParser()
-    elif parser_type == PARSER_PRICE:
-        parser = PriceParser()
+    parser = PARSERS[parser_type](
+        vectorized=vectorized,
+        workers=workers,
+        streaming=streaming,
+        incremental=incremental,
+        memo_size=memo_size,
+        prefetch=prefetch,
+        source=ParquetSource(source_path) if source_path else None,
+        sink=ParquetSink(sink_dir) if sink_dir else None,
+        reparse=reparse,
+    )
+
+    profiler = cProfile.Profile() if profile_path else None
+    progress_bar = None
 
     try:
+        if profiler:
+            profiler.enable()
+
         total = parser.get_total_records(only_missing)
-        progress_bar = None
 
-        logger.info(f"Starting car data parsing process with batch size: {batch_size}")
+        logger.info(
+            f"Starting car data parsing process with batch size: {batch_size}"
+            f" and {parser.workers} worker(s)"
+        )
 
         for info in parser.run(batch_size, only_missing, total):
             if info == parser.STATUS_PROCESSING:
@@ -56,6 +108,15 @@ def run_car_data_parser(batch_size: int, parser_type: str, only_missing: bool):
             f"An unexpected error occurred during the parsing process: {e}", exc_info=True
         )
 
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(profile_path)
+            logger.info(f"cProfile stats written to {profile_path}")
+
+            for line in parser.timer.summary():
+                logger.info(line)
+
 
 if __name__ == "__main__":
     arguments = argparse.ArgumentParser(description="Data Parser")
@@ -69,13 +130,92 @@ if __name__ == "__main__":
         "--parser-type",
         type=str,
         default="details",
-        help="Data Parser to run (details/summary/price)",
+        choices=list(PARSERS),
+        help="Data Parser to run (details/summary/price, or all three over one scan)",
     )
     arguments.add_argument(
         "--only-missing",
         action="store_true",
         help="Run only on missing entries."
     )
+    arguments.add_argument(
+        "--row-wise",
+        action="store_true",
+        help="Extract row by row with df.apply instead of the vectorized column extraction."
+    )
+    arguments.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of processes parsing batches in parallel (default: 1)",
+    )
+    arguments.add_argument(
+        "--stream",
+        action="store_true",
+        help="Read all batches from one server-side cursor instead of one query per batch."
+    )
+    arguments.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Run only on listings updated since the parser's last incremental run."
+    )
+    arguments.add_argument(
+        "--memo-size",
+        type=int,
+        default=0,
+        help="Reuse parse results of up to this many distinct raw texts (default: 0, off)",
+    )
+    arguments.add_argument(
+        "--prefetch",
+        type=int,
+        default=0,
+        help="Read up to this many batches ahead and save in the background (default: 0, off)",
+    )
+    arguments.add_argument(
+        "--profile",
+        type=str,
+        nargs="?",
+        const="parseRawListing.prof",
+        help="Write cProfile stats to this file (default: parseRawListing.prof) and log"
+        " per-step timings at the end of the run",
+    )
+    arguments.add_argument(
+        "--source",
+        type=str,
+        help="Read raw_listing rows from this Parquet/Arrow file or directory instead of the db",
+    )
+    arguments.add_argument(
+        "--sink",
+        type=str,
+        help="Write parsed car/details/price rows as Parquet to this directory instead of the db",
+    )
+    arguments.add_argument(
+        "--reparse",
+        action="store_true",
+        help="Parse rows again even when their raw section is unchanged, e.g. after a parser"
+        " changed",
+    )
     args = arguments.parse_args()
 
-    run_car_data_parser(args.batch_size, args.parser_type, args.only_missing)
+    if args.incremental and (args.source or args.sink):
+        arguments.error("--incremental can't be combined with --source or --sink")
+    if args.only_missing and args.source:
+        arguments.error("--only-missing can't be combined with --source")
+    if args.workers > 1 and args.prefetch > 0:
+        arguments.error("--prefetch can't be combined with --workers above 1")
+
+    run_car_data_parser(
+        args.batch_size,
+        args.parser_type,
+        args.only_missing,
+        vectorized=not args.row_wise,
+        workers=args.workers,
+        streaming=args.stream,
+        incremental=args.incremental,
+        memo_size=args.memo_size,
+        prefetch=args.prefetch,
+        profile_path=args.profile,
+        source_path=args.source,
+        sink_dir=args.sink,
+        reparse=args.reparse,
+    )
@@ -1,34 +1,218 @@
-from datetime import datetime
+import time
 
 from itemadapter import ItemAdapter
+from scrapy.crawler import Crawler
 from scrapy.spiders import Spider
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy import func, or_
+from sqlalchemy.dialects.postgresql import Insert, insert
+from twisted.internet import defer, reactor, task, threads
+from twisted.python.threadpool import ThreadPool
 
 from scripts.collectors.scraper.scraper import items as i
 from scripts.collectors.scraper.scraper.items import DetailsItem as di
 from scripts.collectors.scraper.scraper.items import ListingItem as li
+from scripts.collectors.scraper.scraper.spiders.details_spider import (
+    CRAWLED,
+    listing_ids_status_query,
+)
 from scripts.shared.Models import RawDetails, RawListing
 from scripts.utils.DbUtil import DbConnector as db
 from scripts.utils.LoggerUtil import Logger
 
 NAME = i.NAME
 
+# Sent on the reactor with pipeline and ids once the rows of those ids are committed.
+# Spiders register the pipelines by their scripts.collectors... path, the path they import
+# this signal through, so both sides see the same module and the same signal object
+rows_written = object()
 
-class ListingItemPipeline:
-    def __init__(self):
-        """
-        Initializes database connection and sessionmaker.
-        """
+
+class BufferedUpsertPipeline:
+    """
+    Collects item rows in memory and writes them as one INSERT ... ON CONFLICT statement
+    every FLUSH_ITEMS items or FLUSH_SECONDS seconds, and when the spider closes, instead
+    of a query and a commit per item.
+
+    Subclasses tell which items they take (_row) and how rows are upserted (_upsert).
+    A row's id is its key in the buffer, so an item scraped twice before a flush is
+    written once, with the newest data.
+
+    Batches are written by a single writer thread, in order, so the reactor keeps
+    downloading while the database works. When more than WRITE_QUEUE_SIZE batches are
+    waiting, process_item returns a Deferred that fires once the oldest one is written,
+    which makes Scrapy hold new items back instead of the buffers growing without limit.
+
+    After each batch the rows_written signal tells the spider which ids are committed.
+    """
+
+    FLUSH_ITEMS = 500
+    FLUSH_SECONDS = 5.0
+    WRITE_QUEUE_SIZE = 4
+    # Whether the ids of rows_written are raw_listing ids
+    WRITES_LISTINGS = False
+
+    def __init__(
+        self,
+        flush_items: int = FLUSH_ITEMS,
+        flush_seconds: float = FLUSH_SECONDS,
+        write_queue_size: int = WRITE_QUEUE_SIZE,
+        crawler: Crawler = None,
+    ):
+        # Only used from the writer thread
         self.session = db().get_session()
         self.logger = Logger(self.__class__.__name__)
+        self.flush_items = max(1, flush_items)
+        self.flush_seconds = flush_seconds
+        self.write_queue_size = max(1, write_queue_size)
+        self.buffer: dict = {}
+        self.last_flush = time.monotonic()
+        self.flush_timer = None
+        # Batches handed to the writer and not written yet, oldest first
+        self.writes: list[defer.Deferred] = []
+        self.writer = ThreadPool(minthreads=1, maxthreads=1, name=self.__class__.__name__)
+        self.crawler = crawler
+
+    @classmethod
+    def from_crawler(cls, crawler: Crawler):
+        return cls(
+            flush_items=crawler.settings.getint("RAW_WRITE_BUFFER_ITEMS", cls.FLUSH_ITEMS),
+            flush_seconds=crawler.settings.getfloat("RAW_WRITE_BUFFER_SECONDS", cls.FLUSH_SECONDS),
+            write_queue_size=crawler.settings.getint("RAW_WRITE_QUEUE_SIZE", cls.WRITE_QUEUE_SIZE),
+            crawler=crawler,
+        )
+
+    def open_spider(self, spider: Spider):
+        self.writer.start()
+        # Lets the process exit when the spider stops without close_spider being called
+        reactor.addSystemEventTrigger("during", "shutdown", self._stop_writer)
+
+        if self.flush_seconds > 0:
+            # Flushes a buffer that stopped filling up, e.g. while the spider waits
+            self.flush_timer = task.LoopingCall(self._flush_if_due)
+            self.flush_timer.start(self.flush_seconds, now=False)
+
+    def close_spider(self, spider: Spider) -> defer.Deferred:
+        """Flushes the buffer, the spider closes once every batch is written."""
+        if self.flush_timer is not None and self.flush_timer.running:
+            self.flush_timer.stop()
+
+        self.flush()
+
+        written = defer.DeferredList(list(self.writes))
+        written.addBoth(lambda _: self._close())
+        return written
 
     def process_item(self, item, spider: Spider):
+        row = self._row(item)
+        if row is None:
+            return item
+
+        self.buffer[row["id"]] = row
+
+        if len(self.buffer) >= self.flush_items:
+            self.flush()
+
+        if len(self.writes) > self.write_queue_size:
+            return self._after(self.writes[0], item)
+
+        return item
+
+    def flush(self):
+        """Hands the buffered rows to the writer thread."""
+        self.last_flush = time.monotonic()
+        if not self.buffer:
+            return
+
+        rows = list(self.buffer.values())
+        self.buffer = {}
+
+        write = threads.deferToThreadPool(reactor, self.writer, self._write, rows)
+        self.writes.append(write)
+        write.addCallback(self._written)
+        write.addErrback(
+            lambda failure: self.logger.error(f"Saving {len(rows)} items failed: {failure.value}")
+        )
+        write.addBoth(lambda _: self.writes.remove(write))
+
+    def _write(self, rows: list[dict]) -> list:
+        """
+        Writes rows in one statement, runs in the writer thread. A failed batch is retried
+        row by row, so one bad item doesn't lose the rest. Returns the ids written.
+        """
+        try:
+            with self.session.begin():
+                written = self.session.execute(self._upsert(rows)).rowcount
+                self._after_upsert(rows)
+            self.logger.info(f"Saved {len(rows)} items, {written} rows inserted or updated")
+            return [row["id"] for row in rows]
+        except Exception as e:
+            self.session.rollback()
+            self.logger.error(f"Bulk save of {len(rows)} items failed, saving one by one: {e}")
+            return self._write_one_by_one(rows)
+
+    def _write_one_by_one(self, rows: list[dict]) -> list:
+        written_ids = []
+        for row in rows:
+            try:
+                with self.session.begin():
+                    self.session.execute(self._upsert([row]))
+                    self._after_upsert([row])
+                written_ids.append(row["id"])
+            except Exception as e:
+                self.session.rollback()
+                self.logger.error(f"Error saving item {row['id']} to DB: {e}")
+
+        return written_ids
+
+    def _written(self, ids: list):
+        if self.crawler is not None:
+            self.crawler.signals.send_catch_log(signal=rows_written, pipeline=self, ids=ids)
+
+    @staticmethod
+    def _after(write: defer.Deferred, item) -> defer.Deferred:
+        """Deferred firing with item once write is done."""
+        waiter = defer.Deferred()
+
+        def release(result):
+            waiter.callback(item)
+            return result
+
+        write.addBoth(release)
+        return waiter
+
+    def _close(self):
+        self._stop_writer()
+        self.session.close()
+
+    def _stop_writer(self):
+        if self.writer.started:
+            self.writer.stop()
+
+    def _flush_if_due(self):
+        if time.monotonic() - self.last_flush >= self.flush_seconds:
+            self.flush()
+
+    def _row(self, item):
+        """Column values of the item, or None when the pipeline doesn't handle it."""
+        raise NotImplementedError()
+
+    def _upsert(self, rows: list[dict]) -> Insert:
+        raise NotImplementedError()
+
+    def _after_upsert(self, rows: list[dict]):
+        """Runs in the transaction of the upsert of rows, which commits only if both succeed."""
+
+
+class ListingItemPipeline(BufferedUpsertPipeline):
+    WRITES_LISTINGS = True
+
+    def _row(self, item):
         """
         Save the scraped raw listing data to the database.
         This method is called for every item pipeline component.
         """
         if not isinstance(item, i.ListingItem):
-            return item
+            return None
 
         adapter = ItemAdapter(item)
 
@@ -36,59 +220,51 @@ class ListingItemPipeline:
         listing_id = adapter.get(li.CONTAINER_ID[NAME])
         if not listing_id:
             self.logger.warning(f"Item received without an 'id'. Skipping item: {item}")
-            self.session.close()
-            return item
-
-        try:
-            # Check if the listing already exists to avoid duplicates
-            existing_listing = self.session.query(RawListing).filter_by(id=listing_id).first()
-
-            if existing_listing:
-                self.logger.info(f"Updating existing listing with ID: {listing_id}")
-                existing_listing.page_url = adapter.get(li.PAGE_URL[NAME])
-                existing_listing.raw_summary = ' '.join(adapter.get(li.CONTAINER_SECTION_SUMMARY[NAME], []))
-                existing_listing.raw_details = ' '.join(adapter.get(li.CONTAINER_SECTION_DETAILS[NAME], []))
-                existing_listing.raw_price = ' '.join(adapter.get(li.CONTAINER_SECTION_PRICE[NAME], []))
-            else:
-                # Create a new RawListing object and populate it with data from the item
-                self.logger.info(f"Adding new listing with ID: {listing_id}")
-                listing = RawListing(
-                    id=listing_id,
-                    page_url=adapter.get(li.PAGE_URL[NAME]),
-                    raw_summary=' '.join(adapter.get(li.CONTAINER_SECTION_SUMMARY[NAME], [])),
-                    raw_details=' '.join(adapter.get(li.CONTAINER_SECTION_DETAILS[NAME], [])),
-                    raw_price=' '.join(adapter.get(li.CONTAINER_SECTION_PRICE[NAME], [])),
-                )
-                self.session.add(listing)
-
-            self.session.commit()
-        except IntegrityError:
-            self.session.rollback()
-            self.logger.error(f"IntegrityError: Duplicate item with ID {listing_id}. Rolling back.")
-        except Exception as e:
-            self.session.rollback()
-            self.logger.error(f"Error saving item {listing_id} to DB: {e}")
-        finally:
-            self.session.close()
-
-        return item
+            return None
 
+        return {
+            "id": listing_id,
+            "page_url": adapter.get(li.PAGE_URL[NAME]),
+            "raw_summary": ' '.join(adapter.get(li.CONTAINER_SECTION_SUMMARY[NAME], [])),
+            "raw_details": ' '.join(adapter.get(li.CONTAINER_SECTION_DETAILS[NAME], [])),
+            "raw_price": ' '.join(adapter.get(li.CONTAINER_SECTION_PRICE[NAME], [])),
+        }
 
-class DetailsItemPipeline:
-    def __init__(self):
+    def _upsert(self, rows: list[dict]) -> Insert:
         """
-        Initializes database connection and sessionmaker.
+        Inserts new listings and updates the changed ones. A listing whose page_url and
+        section hashes are the same as stored is left alone, updated_at included, so
+        incremental parsing skips it too.
         """
-        self.session = db().get_session()
-        self.logger = Logger(self.__class__.__name__)
+        statement = insert(RawListing).values(rows)
+        excluded = statement.excluded
 
-    def process_item(self, item, spider: Spider):
+        return statement.on_conflict_do_update(
+            index_elements=[RawListing.id],
+            set_={
+                RawListing.page_url: excluded.page_url,
+                RawListing.raw_summary: excluded.raw_summary,
+                RawListing.raw_details: excluded.raw_details,
+                RawListing.raw_price: excluded.raw_price,
+                RawListing.updated_at: func.now(),
+            },
+            where=or_(
+                RawListing.page_url.is_distinct_from(excluded.page_url),
+                RawListing.summary_hash.is_distinct_from(func.md5(excluded.raw_summary)),
+                RawListing.details_hash.is_distinct_from(func.md5(excluded.raw_details)),
+                RawListing.price_hash.is_distinct_from(func.md5(excluded.raw_price)),
+            ),
+        )
+
+
+class DetailsItemPipeline(BufferedUpsertPipeline):
+    def _row(self, item):
         """
         Save the scraped raw listing data to the database.
         This method is called for every item pipeline component.
         """
         if not isinstance(item, i.DetailsItem):
-            return item
+            return None
 
         adapter = ItemAdapter(item)
 
@@ -96,42 +272,38 @@ class DetailsItemPipeline:
         details_id = str(adapter.get(di.ID[NAME]))
         if not details_id:
             self.logger.warning(f"Item received without an 'id'. Skipping item: {item}")
-            self.session.close()
-            return item
+            return None
 
-        try:
-            existing_details = self.session.query(RawDetails).filter_by(id=details_id).first()
-
-            if existing_details:
-                self.logger.info(f"Updating existing details with ID: {details_id}")
-                existing_details.page_url = adapter.get(di.PAGE_URL[NAME])
-                existing_details.raw_description = ' '.join(adapter.get(di.RAW_DESCRIPTION[NAME], []))
-                existing_details.raw_basic_information = ' '.join(adapter.get(di.RAW_BASIC_INFORMATION[NAME], []))
-                existing_details.raw_specification = ' '.join(adapter.get(di.RAW_SPECIFICATION[NAME], []))
-                existing_details.raw_equipment = ' '.join(adapter.get(di.RAW_EQUIPMENT[NAME], []))
-                existing_details.raw_seller_info = ' '.join(adapter.get(di.RAW_SELLER_INFO[NAME], []))
-                existing_details.updated_at = datetime.now()
-            else:
-                self.logger.info(f"Adding new details with ID: {details_id}")
-                listing = RawDetails(
-                    id=details_id,
-                    page_url = adapter.get(di.PAGE_URL[NAME]),
-                    raw_description = ' '.join(adapter.get(di.RAW_DESCRIPTION[NAME], [])),
-                    raw_basic_information = ' '.join(adapter.get(di.RAW_BASIC_INFORMATION[NAME], [])),
-                    raw_specification = ' '.join(adapter.get(di.RAW_SPECIFICATION[NAME], [])),
-                    raw_equipment = ' '.join(adapter.get(di.RAW_EQUIPMENT[NAME], [])),
-                    raw_seller_info = ' '.join(adapter.get(di.RAW_SELLER_INFO[NAME], [])),
-                )
-                self.session.add(listing)
-
-            self.session.commit()
-        except IntegrityError:
-            self.session.rollback()
-            self.logger.error(f"IntegrityError: Duplicate item with ID {details_id}. Rolling back.")
-        except Exception as e:
-            self.session.rollback()
-            self.logger.error(f"Error saving item {details_id} to DB: {e}")
-        finally:
-            self.session.close()
+        return {
+            "id": details_id,
+            "page_url": adapter.get(di.PAGE_URL[NAME]),
+            "raw_description": ' '.join(adapter.get(di.RAW_DESCRIPTION[NAME], [])),
+            "raw_basic_information": ' '.join(adapter.get(di.RAW_BASIC_INFORMATION[NAME], [])),
+            "raw_specification": ' '.join(adapter.get(di.RAW_SPECIFICATION[NAME], [])),
+            "raw_equipment": ' '.join(adapter.get(di.RAW_EQUIPMENT[NAME], [])),
+            "raw_seller_info": ' '.join(adapter.get(di.RAW_SELLER_INFO[NAME], [])),
+        }
 
-        return item
\ No newline at end of file
+    def _upsert(self, rows: list[dict]) -> Insert:
+        statement = insert(RawDetails).values(rows)
+        excluded = statement.excluded
+
+        return statement.on_conflict_do_update(
+            index_elements=[RawDetails.id],
+            set_={
+                RawDetails.page_url: excluded.page_url,
+                RawDetails.raw_description: excluded.raw_description,
+                RawDetails.raw_basic_information: excluded.raw_basic_information,
+                RawDetails.raw_specification: excluded.raw_specification,
+                RawDetails.raw_equipment: excluded.raw_equipment,
+                RawDetails.raw_seller_info: excluded.raw_seller_info,
+                RawDetails.updated_at: func.now(),
+            },
+        )
+
+    def _after_upsert(self, rows: list[dict]):
+        """
+        Marks the listings CRAWLED together with their details, so a listing is never
+        CRAWLED without a raw_details row when the write fails.
+        """
+        self.session.execute(listing_ids_status_query([row["id"] for row in rows], CRAWLED))
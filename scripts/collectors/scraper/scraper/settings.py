@@ -119,3 +119,20 @@ CONCURRENT_REQUESTS_PER_DOMAIN = 2
 # Set settings whose default value is deprecated to a future-proof value
 FEED_EXPORT_ENCODING = "utf-8"
 LOG_FILE = "spider.log"
+
+# Item pipelines write raw_listing/raw_details in bulk, every RAW_WRITE_BUFFER_ITEMS items
+# or RAW_WRITE_BUFFER_SECONDS seconds, whichever comes first, and when the spider closes.
+# The writes run in a writer thread, items are held back while more than
+# RAW_WRITE_QUEUE_SIZE batches wait for it
+RAW_WRITE_BUFFER_ITEMS = 500
+RAW_WRITE_BUFFER_SECONDS = 5.0
+RAW_WRITE_QUEUE_SIZE = 4
+
+# DetailsSpider writes raw_listing status transitions together, once STATUS_FLUSH_SIZE ids
+# are waiting or every STATUS_FLUSH_SECONDS seconds, and when the spider closes
+STATUS_FLUSH_SIZE = 500
+STATUS_FLUSH_SECONDS = 5.0
+
+# DetailsSpider leases the listings it claims for DETAILS_LEASE_SECONDS seconds, renewed while
+# it runs. Listings of a spider that died are claimed by another one once the lease expires
+DETAILS_LEASE_SECONDS = 900
@@ -1,3 +1,8 @@
+import os
+import socket
+import threading
+import uuid
+from datetime import timedelta
 from typing import Literal, TypeAlias
 from urllib.parse import urljoin
 
@@ -5,8 +10,24 @@ import scrapy
 import scrapy.signals
 from parsel import Selector
 from scrapy.http import Request, Response
-from sqlalchemy import and_, exists, not_, select, update
+from scrapy.utils.defer import maybe_deferred_to_future
+from sqlalchemy import (
+    BigInteger,
+    Update,
+    all_,
+    and_,
+    any_,
+    bindparam,
+    exists,
+    func,
+    not_,
+    or_,
+    select,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import Session
+from twisted.internet import defer, task, threads
 
 from scripts.collectors.scraper.scraper import items as i
 from scripts.collectors.scraper.scraper.items import DetailsItem
@@ -22,6 +43,9 @@ CRAWLED = "Crawled"
 STATUS_TYPE: TypeAlias = Literal["Queued", "Ready", "Crawled"]
 
 BATCH_SIZE = 1000
+STATUS_FLUSH_SIZE = 500
+STATUS_FLUSH_SECONDS = 5.0
+LEASE_SECONDS = 900
 
 
 def _extract_raw_to_item(item: DetailsItem, article: Selector, field: i.TYPE):
@@ -42,39 +66,163 @@ def _extract_text_to_item(item: DetailsItem, response: Response, field: i.TYPE):
     item[field[i.NAME]] = [text.strip() for text in all_text_nodes if text.strip()]
 
 
-def get_missing_and_ready_listing_ids_from_db(session: Session, limit: int) -> list[str]:
-    """Fetches all IDs from RawListing that do not have a corresponding entry in RawDetails."""
-    query = (
+def claim_listing_ids(
+    session: Session, owner: str, limit: int, lease_seconds: float, skip_ids=()
+) -> list[str]:
+    """
+    Claims up to limit listings without details that are READY, CRAWLED (by an older spider
+    whose details write failed) or QUEUED under a lease that expired because their spider
+    died, or under no lease at all (queued before leases existed), by setting them QUEUED
+    under owner's lease. skip_ids, e.g. the listings whose
+    request already failed in this run, are left for other spiders.
+
+    Rows are picked with FOR UPDATE SKIP LOCKED and updated in the same statement, so
+    spiders claiming at the same time get disjoint ids without waiting for each other.
+    """
+    skip_param = bindparam("skip_ids", [int(id_) for id_ in skip_ids], type_=ARRAY(BigInteger))
+    claimable = (
         select(RawListing.id)
         .where(
             and_(
                 not_(exists(select(1).where(RawDetails.id == RawListing.id))),
-                RawListing.status == READY,
+                RawListing.id != all_(skip_param),
+                or_(
+                    RawListing.status.in_([READY, CRAWLED]),
+                    and_(
+                        RawListing.status == QUEUED,
+                        or_(
+                            RawListing.lease_expires_at.is_(None),
+                            RawListing.lease_expires_at < func.now(),
+                        ),
+                    ),
+                ),
             )
         )
         .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    query = (
+        update(RawListing)
+        .where(RawListing.id.in_(claimable.scalar_subquery()))
+        .values(
+            status=QUEUED,
+            lease_owner=owner,
+            lease_expires_at=func.now() + timedelta(seconds=lease_seconds),
+        )
+        .returning(RawListing.id)
     )
 
     result = session.execute(query).scalars().all()
+    session.commit()
     return [str(id_) for id_ in result]
 
 
-def set_listing_ids_status(session: Session, ids: list, status: STATUS_TYPE):
-    query = update(RawListing).where(RawListing.id.in_(ids)).values(status=status)
+def renew_listing_leases(session: Session, owner: str, lease_seconds: float):
+    """Extends the leases owner still holds, i.e. of the listings it hasn't crawled yet."""
+    query = (
+        update(RawListing)
+        .where(and_(RawListing.lease_owner == owner, RawListing.status == QUEUED))
+        .values(lease_expires_at=func.now() + timedelta(seconds=lease_seconds))
+    )
     session.execute(query)
     session.commit()
-    return True
 
 
-def set_not_crawled_listing_ids_status(session: Session, ids: list, status: STATUS_TYPE):
+def release_listing_leases(session: Session, owner: str):
+    """Sets the listings owner claimed and didn't crawl back to READY."""
     query = (
         update(RawListing)
-        .where(and_(RawListing.id.in_(ids), not_(RawListing.status == CRAWLED)))
-        .values(status=status)
+        .where(and_(RawListing.lease_owner == owner, RawListing.status == QUEUED))
+        .values(status=READY, lease_owner=None, lease_expires_at=None)
     )
     session.execute(query)
     session.commit()
-    return True
+
+
+def listing_ids_status_query(ids: list, status: STATUS_TYPE) -> Update:
+    """
+    UPDATE raw_listing SET status = status WHERE id = ANY(ids), the ids are sent as one
+    array parameter. The transition ends the lease of the listings, READY never replaces
+    CRAWLED.
+    """
+    ids_param = bindparam("ids", [int(id_) for id_ in ids], type_=ARRAY(BigInteger))
+    query = (
+        update(RawListing)
+        .where(RawListing.id == any_(ids_param))
+        .values(status=status, lease_owner=None, lease_expires_at=None)
+    )
+
+    if status == READY:
+        query = query.where(not_(RawListing.status == CRAWLED))
+
+    return query
+
+
+class ListingStatusBuffer:
+    """
+    Status transitions of raw_listing rows kept in memory and written together, one
+    UPDATE per status in a single transaction, instead of a transaction per page.
+
+    The latest transition of an id wins, except that READY never replaces CRAWLED.
+    A flush that fails keeps the transitions for the next one.
+
+    add is called from the reactor and flush from a worker thread, a flush writes the
+    transitions pending when it starts while new ones keep coming in.
+    """
+
+    def __init__(self, connector: db, flush_size: int = STATUS_FLUSH_SIZE):
+        self.connector = connector
+        self.flush_size = max(1, flush_size)
+        self.pending: dict[str, STATUS_TYPE] = {}
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.pending)
+
+    @property
+    def full(self) -> bool:
+        return len(self.pending) >= self.flush_size
+
+    def add(self, ids: list, status: STATUS_TYPE):
+        """Records the transition of ids to status."""
+        with self.lock:
+            self._merge({id_: status for id_ in ids})
+
+    def flush(self):
+        """Writes the pending transitions, blocks, so the spider runs it in a thread."""
+        with self.lock:
+            flushed, self.pending = self.pending, {}
+
+        if not flushed:
+            return
+
+        ids_by_status: dict[STATUS_TYPE, list] = {}
+        for id_, status in flushed.items():
+            ids_by_status.setdefault(status, []).append(id_)
+
+        try:
+            with self.connector.get_session() as current_session, current_session.begin():
+                for status, ids in ids_by_status.items():
+                    current_session.execute(listing_ids_status_query(ids, status))
+        except Exception as e:
+            terminal.error(f"Could not update status of {len(flushed)} listings: {e}")
+            with self.lock:
+                # Transitions added during the flush are newer than the failed ones
+                newer, self.pending = self.pending, {}
+                self._merge(flushed)
+                self._merge(newer)
+            return
+
+        terminal.debug(
+            "Updated statuses: "
+            + ", ".join(f"{status} {len(ids)}" for status, ids in ids_by_status.items())
+        )
+
+    def _merge(self, transitions: dict[str, STATUS_TYPE]):
+        for id_, status in transitions.items():
+            if status == READY and self.pending.get(id_) == CRAWLED:
+                continue
+            self.pending[id_] = status
 
 
 def yield_missing_details_ids_from_db(session: Session):
@@ -104,7 +252,7 @@ class DetailsSpider(scrapy.Spider):
         "LOG_FILE": env.root + "/scripts/collectors/scraper/logs/details_spider.log",
         "LOG_FILE_APPEND": False,
         "ITEM_PIPELINES": {
-            "scraper.pipelines.DetailsItemPipeline": 300,
+            "scripts.collectors.scraper.scraper.pipelines.DetailsItemPipeline": 300,
         },
         "CONCURRENT_REQUESTS_PER_DOMAIN": 2,
         "CONCURRENT_REQUESTS": 6,
@@ -113,46 +261,61 @@ class DetailsSpider(scrapy.Spider):
 
     def __init__(self, max_pages=None, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        current_session = db().get_session()
+        # One engine for the spider, its connection pool is shared by the worker threads
+        self.db = db()
+        current_session = self.db.get_session()
         try:
             self.pages_to_crawl_count = _get_amount_of_missing_details_from_db(current_session)
         finally:
             current_session.close()
         self.base_url = "https://www.otomoto.pl/"
         self.missing_ids = []
+        self.statuses = ListingStatusBuffer(self.db)
+        # Listings whose request failed, released and not claimed again by this spider
+        self.failed_ids = set()
+        self.status_timer = None
+        # Identifies this spider's leases, unique across machines and processes
+        self.lease_owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.lease_seconds = LEASE_SECONDS
         terminal.debug(f"Spider initialized with {self.pages_to_crawl_count} pages to crawl...")
 
     async def start(self):
+        self.statuses.flush_size = self.settings.getint("STATUS_FLUSH_SIZE", STATUS_FLUSH_SIZE)
+        self.lease_seconds = self.settings.getfloat("DETAILS_LEASE_SECONDS", LEASE_SECONDS)
+        flush_seconds = self.settings.getfloat("STATUS_FLUSH_SECONDS", STATUS_FLUSH_SECONDS)
+        if flush_seconds > 0:
+            # The database work runs in a thread, the next call waits until it is done
+            self.status_timer = task.LoopingCall(threads.deferToThread, self._save_statuses)
+            self.status_timer.start(flush_seconds, now=False)
+
+        terminal.info(f"Claiming listings as {self.lease_owner}")
         while True:
-            with db().get_session() as current_session:
-                self.missing_ids = get_missing_and_ready_listing_ids_from_db(
-                    current_session, BATCH_SIZE
-                )
-                set_listing_ids_status(current_session, self.missing_ids, QUEUED)
-                found_ids = False
-
-                for car_id in self.missing_ids:
-                    found_ids = True
-                    details_url = urljoin(self.base_url, str(car_id))
-
-                    if self.crawler.engine.needs_backout():
-                        terminal.info(
-                            "Scheduler needs backout. Waiting for scheduler to become empty..."
-                        )
-                        await self.crawler.signals.wait_for(scrapy.signals.scheduler_empty)
-                        terminal.info("Scheduler is empty. Resuming yielding requests.")
-
-                    yield Request(
-                        url=details_url,
-                        callback=self.parse,
-                        meta={"details_id": car_id},
-                        headers={"Referer": "https://www.otomoto.pl/osobowe/"},
-                    )
+            await maybe_deferred_to_future(threads.deferToThread(self._save_statuses))
+            self.missing_ids = await maybe_deferred_to_future(
+                threads.deferToThread(self._claim_listing_ids)
+            )
 
-                set_not_crawled_listing_ids_status(current_session, self.missing_ids, READY)
+            if not self.missing_ids:
+                terminal.info("No missing details found. Spider will finish.")
+                break
 
-                if not found_ids:
-                    terminal.info("No missing details found. Spider will finish.")
+            for car_id in self.missing_ids:
+                details_url = urljoin(self.base_url, str(car_id))
+
+                if self.crawler.engine.needs_backout():
+                    terminal.info(
+                        "Scheduler needs backout. Waiting for scheduler to become empty..."
+                    )
+                    await self.crawler.signals.wait_for(scrapy.signals.scheduler_empty)
+                    terminal.info("Scheduler is empty. Resuming yielding requests.")
+
+                yield Request(
+                    url=details_url,
+                    callback=self.parse,
+                    errback=self.on_error,
+                    meta={"details_id": car_id},
+                    headers={"Referer": "https://www.otomoto.pl/osobowe/"},
+                )
 
     def parse(self, response: Response):
         # Retrieve the details_id from the request's meta
@@ -176,15 +339,59 @@ class DetailsSpider(scrapy.Spider):
         _extract_text_to_item(item, response, DetailsItem.RAW_EQUIPMENT)
         _extract_all_raw_to_item(item, response, DetailsItem.RAW_SELLER_INFO)
 
+        # DetailsItemPipeline marks the listing CRAWLED once the details are written
         yield item
 
-        with db().get_session() as current_session:
-            set_listing_ids_status(current_session, [details_id], CRAWLED)
-
         self.pages_to_crawl_count -= 1
         terminal.debug(f"Processed ID: {details_id}. Pages to crawl: {self.pages_to_crawl_count}")
 
-    def closed(self, reason):
+    def on_error(self, failure):
+        """Releases the lease of a listing whose request failed, instead of renewing it."""
+        details_id = failure.request.meta.get("details_id")
+        terminal.warning(f"Request for ID {details_id} failed: {failure.value!r}")
+        if not details_id:
+            return
+
+        self.failed_ids.add(details_id)
+        self.statuses.add([details_id], READY)
+        if self.statuses.full:
+            threads.deferToThread(self.statuses.flush)
+
+    def _claim_listing_ids(self) -> list[str]:
+        with self.db.get_session() as current_session:
+            return claim_listing_ids(
+                current_session,
+                self.lease_owner,
+                BATCH_SIZE,
+                self.lease_seconds,
+                skip_ids=list(self.failed_ids),
+            )
+
+    def _save_statuses(self):
+        """
+        Flushes the buffered statuses and extends the leases of the listings still queued.
+        Blocks, runs in a worker thread.
+        """
+        self.statuses.flush()
+        try:
+            with self.db.get_session() as current_session:
+                renew_listing_leases(current_session, self.lease_owner, self.lease_seconds)
+        except Exception as e:
+            terminal.error(f"Could not renew leases: {e}")
+
+    def _release(self):
+        """Saves the last statuses and releases the leases left, runs in a worker thread."""
+        # Called on errors and interrupts too, the buffered statuses are kept
+        self.statuses.flush()
+        if len(self.statuses):
+            terminal.error(f"{len(self.statuses)} listing statuses were not saved")
+
         terminal.info("Spider closing - updating QUEUED statuses to READY...")
-        with db().get_session() as current_session:
-            set_not_crawled_listing_ids_status(current_session, self.missing_ids, READY)
+        with self.db.get_session() as current_session:
+            release_listing_leases(current_session, self.lease_owner)
+
+    def closed(self, reason) -> defer.Deferred:
+        if self.status_timer is not None and self.status_timer.running:
+            self.status_timer.stop()
+
+        return threads.deferToThread(self._release)
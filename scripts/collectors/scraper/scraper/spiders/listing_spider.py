@@ -1,16 +1,30 @@
 import re
+from typing import Optional
 
 import scrapy
 from parsel import Selector
 from scrapy.http import Response
+from scrapy.utils.defer import maybe_deferred_to_future
+from sqlalchemy import BigInteger, any_, bindparam, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Session
+from twisted.internet import threads
 
 from scripts.collectors.scraper.scraper import items as i
 from scripts.collectors.scraper.scraper.items import ListingItem
+from scripts.shared.Models import RawListing
 from scripts.utils import EnvUtil as env
+from scripts.utils.DbUtil import DbConnector as db
 from scripts.utils.LoggerUtil import Logger
 
 terminal = Logger("ListingSpider")
 
+KNOWN_PAGES_TO_STOP = 2
+# Page numbers of the results pagination, the highest one is the last page
+PAGINATION_SELECTOR = (
+    "//ul[@data-testid='pagination-list']//li[@data-testid='pagination-list-item']//text()"
+)
+
 
 def _extract_raw_to_item(item: ListingItem, article: Selector, field: i.TYPE):
     item[field[i.NAME]] = article.xpath(field[i.SELECTOR]).get()
@@ -27,6 +41,37 @@ def _extract_text_to_item(item: ListingItem, article: Selector, field: i.TYPE):
     item[field[i.NAME]] = [text.strip() for text in all_text_nodes if text.strip()]
 
 
+def get_known_listing_ids(session: Session, ids: list) -> set[str]:
+    """The ids already in raw_listing, checked with one id = ANY(...) query."""
+    ids_param = bindparam("ids", [int(id_) for id_ in ids], type_=ARRAY(BigInteger))
+    query = select(RawListing.id).where(RawListing.id == any_(ids_param))
+
+    return {str(id_) for id_ in session.execute(query).scalars()}
+
+
+def get_page_url(url: str, page: int) -> str:
+    """url of the given results page."""
+    if "?" not in url:
+        return f"{url}?page={page}"
+
+    if not re.search(r"page=\d+", url):  # If 'page=' not already in URL, add it
+        return f"{url}&page={page}"
+
+    return re.sub(r"(page=)\d+", r"\g<1>" + str(page), url)
+
+
+def get_last_page(response: Response) -> Optional[int]:
+    page_numbers = [
+        int(text) for text in response.xpath(PAGINATION_SELECTOR).getall() if text.strip().isdigit()
+    ]
+    return max(page_numbers, default=None)
+
+
+def _is_enabled(value) -> bool:
+    """Spider arguments come as strings, e.g. -a incremental=true"""
+    return str(value).lower() in ("1", "true", "yes")
+
+
 class ListingSpider(scrapy.Spider):
     name = "listing"
     allowed_domains = ["otomoto.pl"]
@@ -35,19 +80,86 @@ class ListingSpider(scrapy.Spider):
         "LOG_FILE": env.root + "/scripts/collectors/scraper/logs/listing_spider.log",
         "LOG_FILE_APPEND": False,
         "ITEM_PIPELINES": {
-            "scraper.pipelines.ListingItemPipeline": 300,
+            "scripts.collectors.scraper.scraper.pipelines.ListingItemPipeline": 300,
         },
     }
 
-    def __init__(self, max_pages=1, *args, **kwargs):
+    def __init__(
+        self,
+        max_pages=1,
+        incremental=False,
+        known_pages_to_stop=KNOWN_PAGES_TO_STOP,
+        *args,
+        **kwargs,
+    ):
+        """
+        Args:
+            max_pages: number of result pages crawled at most.
+            incremental: stop paginating once known_pages_to_stop pages in a row only
+                list ids already in raw_listing. Results are sorted newest first, so the
+                pages after them were crawled before.
+        """
         super().__init__(*args, **kwargs)
         self.max_pages_to_crawl = int(max_pages)
+        self.incremental = _is_enabled(incremental)
+        self.known_pages_to_stop = max(1, int(known_pages_to_stop))
+        self.known_pages_in_row = 0
+        self.db = db()
         terminal.info(f"Spider initialized with max_pages_to_crawl: {self.max_pages_to_crawl}")
+        if self.incremental:
+            terminal.info(
+                f"Incremental mode, stopping after {self.known_pages_to_stop} known pages in a row"
+            )
 
-    def parse(self, response: Response):
+    async def parse(self, response: Response):
         terminal.info(f"Crawling listing page: {response.url}")
 
+        items = self._extract_items(response)
+        page_ids = [item[ListingItem.CONTAINER_ID[i.NAME]] for item in items]
+        # Checked before this page's own items can be written
+        only_known_pages_left = self.incremental and await self._only_known_pages_left(page_ids)
+
+        for item in items:
+            yield item
+
+        current_page = 1
+        match = re.search(r"page=(\d+)", response.url)
+        if match:
+            current_page = int(match.group(1))
+
+        terminal.debug(
+            f"Current page: {current_page}, Max pages to crawl: {self.max_pages_to_crawl}"
+        )
+
+        if response.meta.get("fanned_out"):
+            # Scheduled together with the other pages by the first one
+            return
+
+        if only_known_pages_left:
+            terminal.info(
+                f"The last {self.known_pages_in_row} pages up to page {current_page} only list"
+                " known ids. Stopping pagination."
+            )
+        elif current_page < self.max_pages_to_crawl:
+            # Incremental mode has to see the pages in order to stop at the known ones
+            last_page = None if self.incremental else get_last_page(response)
+
+            if last_page:
+                for request in self._fan_out(response, current_page, last_page):
+                    yield request
+                return
+
+            next_page_url = get_page_url(response.url, current_page + 1)
+            self.logger.info(f"Constructed next page URL: {next_page_url}")
+            yield response.follow(next_page_url, callback=self.parse)
+        else:
+            terminal.debug(
+                f"Reached maximum of {self.max_pages_to_crawl} pages. Stopping pagination."
+            )
+
+    def _extract_items(self, response: Response) -> list[ListingItem]:
         listings = response.xpath(ListingItem.CONTAINER_ARTICLE[i.SELECTOR])
+        items = []
 
         for listing_element in listings:
             item = ListingItem()
@@ -66,32 +178,49 @@ class ListingSpider(scrapy.Spider):
             _extract_text_to_item(item, listing_element, ListingItem.CONTAINER_SECTION_DETAILS)
             _extract_text_to_item(item, listing_element, ListingItem.CONTAINER_SECTION_PRICE)
 
-            yield item
-
-        current_page = 1
-        match = re.search(r"page=(\d+)", response.url)
-        if match:
-            current_page = int(match.group(1))
+            items.append(item)
+
+        return items
+
+    def _fan_out(self, response: Response, current_page: int, last_page: int):
+        """
+        Requests every page after current_page up to last_page and max_pages at once, so
+        they are downloaded as concurrently as the settings allow. Lower pages get higher
+        priority, the newest listings come first.
+        """
+        pages = range(current_page + 1, min(last_page, self.max_pages_to_crawl) + 1)
+        if not pages:
+            terminal.debug(f"Page {current_page} of {last_page} is the last one.")
+            return
+
+        terminal.info(f"Scheduling pages {pages.start}-{pages.stop - 1} of {last_page}")
+
+        for page in pages:
+            yield response.follow(
+                get_page_url(response.url, page),
+                callback=self.parse,
+                priority=-page,
+                meta={"fanned_out": True},
+            )
 
-        terminal.debug(
-            f"Current page: {current_page}, Max pages to crawl: {self.max_pages_to_crawl}"
-        )
+    async def _only_known_pages_left(self, page_ids: list) -> bool:
+        """
+        Counts pages whose listings are all in raw_listing, True once enough are in a row.
+        The query runs in a thread, the reactor keeps going meanwhile.
+        """
+        known_ids = set()
+        if page_ids:
+            known_ids = await maybe_deferred_to_future(
+                threads.deferToThread(self._get_known_listing_ids, page_ids)
+            )
 
-        if current_page < self.max_pages_to_crawl:
-            next_page = current_page + 1
+        if page_ids and len(known_ids) == len(set(page_ids)):
+            self.known_pages_in_row += 1
+        else:
+            self.known_pages_in_row = 0
 
-            if "?" in response.url:
-                next_page_url = re.sub(r"(page=)\d+", r"\g<1>" + str(next_page), response.url)
-                if not re.search(
-                    r"page=\d+", response.url
-                ):  # If 'page=' not already in URL, add it
-                    next_page_url = f"{response.url}&page={next_page}"
-            else:
-                next_page_url = f"{response.url}?page={next_page}"
+        return self.known_pages_in_row >= self.known_pages_to_stop
 
-            self.logger.info(f"Constructed next page URL: {next_page_url}")
-            yield response.follow(next_page_url, callback=self.parse)
-        else:
-            terminal.debug(
-                f"Reached maximum of {self.max_pages_to_crawl} pages. Stopping pagination."
-            )
+    def _get_known_listing_ids(self, ids: list) -> set[str]:
+        with self.db.get_session() as current_session:
+            return get_known_listing_ids(current_session, ids)
@@ -0,0 +1,320 @@
+import json
+import os
+import time
+from typing import Optional
+
+from scrapy.crawler import Crawler
+from scrapy.http import Request, Response
+from twisted.internet import task
+
+from scripts.collectors.scraper.scraper import items as i
+from scripts.collectors.scraper.scraper.items import ListingItem
+from scripts.collectors.scraper.scraper.pipelines import rows_written
+from scripts.collectors.scraper.scraper.spiders.listing_spider import (
+    ListingSpider,
+    get_last_page,
+    get_page_url,
+)
+from scripts.utils import EnvUtil as env
+from scripts.utils.LoggerUtil import Logger
+
+terminal = Logger("ShardedListingSpider")
+
+SEARCH_URL = "https://www.otomoto.pl/osobowe?search%5Border%5D=created_at_first%3Adesc"
+PRICE_FROM_PARAM = "search%5Bfilter_float_price%3Afrom%5D"
+PRICE_TO_PARAM = "search%5Bfilter_float_price%3Ato%5D"
+
+# Otomoto doesn't serve search results past this page
+PAGE_CAP = 500
+CHECKPOINT_SECONDS = 30.0
+# New listings push the older ones to later pages of the newest-first search, so the pages
+# crawled long ago no longer hold the same listings. Older checkpoints are ignored
+CHECKPOINT_MAX_AGE_HOURS = 6.0
+# Lower bounds of the price bands (PLN) the search starts with, the last one is open-ended
+ROOT_PRICE_BOUNDS = [
+    0, 5_000, 10_000, 15_000, 20_000, 25_000, 30_000, 40_000, 50_000,
+    60_000, 75_000, 100_000, 125_000, 150_000, 200_000, 300_000, 500_000,
+]
+
+
+class ListingShard:
+    """
+    Price band of the osobowe search, price_from to price_to PLN, both included, and how
+    far it was crawled. price_to None means no upper bound.
+    """
+
+    def __init__(
+        self,
+        price_from: int,
+        price_to: Optional[int] = None,
+        last_page: Optional[int] = None,
+        crawled_pages=(),
+        is_split: bool = False,
+    ):
+        self.price_from = price_from
+        self.price_to = price_to
+        # Known once the first page is crawled
+        self.last_page = last_page
+        self.crawled_pages = set(crawled_pages)
+        # Too many pages, crawled as two halves instead
+        self.is_split = is_split
+
+    @property
+    def key(self) -> str:
+        return f"{self.price_from}-{'' if self.price_to is None else self.price_to}"
+
+    @property
+    def url(self) -> str:
+        url = f"{SEARCH_URL}&{PRICE_FROM_PARAM}={self.price_from}"
+        if self.price_to is not None:
+            url += f"&{PRICE_TO_PARAM}={self.price_to}"
+
+        return url
+
+    @property
+    def done(self) -> bool:
+        return self.is_split or (self.last_page is not None and not self.missing_pages())
+
+    def missing_pages(self) -> list[int]:
+        if self.last_page is None:
+            return [1]
+
+        return [page for page in range(1, self.last_page + 1) if page not in self.crawled_pages]
+
+    def can_split(self) -> bool:
+        return self.price_to is None or self.price_to > self.price_from
+
+    def halves(self) -> list["ListingShard"]:
+        """Two disjoint shards covering this one's price band."""
+        if self.price_to is None:
+            middle = max(self.price_from * 2, self.price_from + 1)
+        else:
+            middle = (self.price_from + self.price_to) // 2
+
+        return [ListingShard(self.price_from, middle), ListingShard(middle + 1, self.price_to)]
+
+    def to_dict(self) -> dict:
+        return {
+            "price_from": self.price_from,
+            "price_to": self.price_to,
+            "last_page": self.last_page,
+            "crawled_pages": sorted(self.crawled_pages),
+            "is_split": self.is_split,
+        }
+
+
+def root_shards(shard_index: int, shard_count: int) -> list[ListingShard]:
+    """The root price bands handled by process shard_index of shard_count."""
+    bounds = ROOT_PRICE_BOUNDS + [None]
+    shards = [
+        ListingShard(price_from, None if price_to is None else price_to - 1)
+        for price_from, price_to in zip(bounds[:-1], bounds[1:], strict=True)
+    ]
+
+    return [shard for n, shard in enumerate(shards) if n % shard_count == shard_index]
+
+
+def read_checkpoint(path: str, max_age_hours: float) -> dict[str, ListingShard]:
+    """The shards saved at path, none when the checkpoint is missing or too old."""
+    if not os.path.exists(path):
+        return {}
+
+    with open(path) as f:
+        checkpoint = json.load(f)
+
+    saved_at = checkpoint.get("saved_at") if isinstance(checkpoint, dict) else None
+    if saved_at is None:
+        terminal.warning(f"Checkpoint {path} has no timestamp, crawling from scratch")
+        return {}
+
+    age_hours = (time.time() - saved_at) / 3600
+    if age_hours > max_age_hours:
+        terminal.warning(
+            f"Checkpoint {path} is {age_hours:.1f} hours old, more than {max_age_hours},"
+            " crawling from scratch"
+        )
+        return {}
+
+    shards = [ListingShard(**shard) for shard in checkpoint["shards"]]
+    return {shard.key: shard for shard in shards}
+
+
+def write_checkpoint(path: str, shards: dict[str, ListingShard]):
+    """Writes to a temporary file first, so a crash never leaves a half written checkpoint."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "w") as f:
+        json.dump(
+            {"saved_at": time.time(), "shards": [shard.to_dict() for shard in shards.values()]},
+            f,
+        )
+
+    os.replace(temporary_path, path)
+
+
+class ShardedListingSpider(ListingSpider):
+    """
+    Crawls the whole osobowe search as disjoint price bands, since one search only reaches
+    PAGE_CAP pages. A band whose first page shows PAGE_CAP pages or more is split in two
+    until every band fits. All bands are crawled at once, their progress is checkpointed
+    to a file, and a restarted spider only requests the pages still missing. A page counts
+    as crawled once ListingItemPipeline committed all of its listings, a checkpoint older
+    than checkpoint_max_age hours is ignored.
+
+    Several processes split the work with shard_index and shard_count, each takes every
+    shard_count-th root band and keeps its own checkpoint.
+    """
+
+    name = "listing_sharded"
+    custom_settings = {
+        **ListingSpider.custom_settings,
+        "LOG_FILE": env.root + "/scripts/collectors/scraper/logs/listing_sharded_spider.log",
+    }
+
+    def __init__(
+        self,
+        shard_index=0,
+        shard_count=1,
+        page_cap=PAGE_CAP,
+        checkpoint=None,
+        checkpoint_max_age=CHECKPOINT_MAX_AGE_HOURS,
+        *args,
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        self.shard_index = int(shard_index)
+        self.shard_count = int(shard_count)
+        self.page_cap = int(page_cap)
+        self.checkpoint_path = checkpoint or (
+            env.root
+            + "/scripts/collectors/scraper/checkpoints/"
+            + f"listing_shards_{self.shard_index}_of_{self.shard_count}.json"
+        )
+        self.checkpoint_timer = None
+        # Pages parsed whose listings aren't all written yet, and the reverse lookup
+        self.unwritten_pages: dict[tuple[str, int], set[str]] = {}
+        self.pages_by_listing_id: dict[str, set[tuple[str, int]]] = {}
+
+        self.shards = read_checkpoint(self.checkpoint_path, float(checkpoint_max_age))
+        if self.shards:
+            terminal.info(f"Resuming {len(self.shards)} shards from {self.checkpoint_path}")
+        else:
+            self.shards = {
+                shard.key: shard for shard in root_shards(self.shard_index, self.shard_count)
+            }
+
+    @classmethod
+    def from_crawler(cls, crawler: Crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        crawler.signals.connect(spider._rows_written, signal=rows_written)
+        return spider
+
+    async def start(self):
+        self.checkpoint_timer = task.LoopingCall(self._save_checkpoint)
+        self.checkpoint_timer.start(CHECKPOINT_SECONDS, now=False)
+
+        for shard in list(self.shards.values()):
+            if shard.done:
+                continue
+
+            for page in shard.missing_pages():
+                yield self._page_request(shard, page)
+
+    def parse(self, response: Response):
+        shard = self.shards[response.meta["shard"]]
+        page = response.meta["page"]
+        terminal.info(f"Crawling page {page} of shard {shard.key}")
+
+        items = self._extract_items(response)
+        # Before the items are yielded, their write may be confirmed as soon as they are
+        self._await_write(shard, page, items)
+        yield from items
+
+        if shard.last_page is None:
+            last_page = get_last_page(response) or 1
+
+            if last_page >= self.page_cap and shard.can_split():
+                yield from self._split(shard, last_page)
+                return
+
+            if last_page >= self.page_cap:
+                terminal.warning(
+                    f"Shard {shard.key} has {last_page} pages and can't be split,"
+                    f" only the first {self.page_cap} are crawled"
+                )
+
+            shard.last_page = min(last_page, self.page_cap)
+            for next_page in range(2, shard.last_page + 1):
+                yield self._page_request(shard, next_page)
+
+    def closed(self, reason):
+        """Runs after the pipelines wrote their last batch."""
+        if self.checkpoint_timer is not None and self.checkpoint_timer.running:
+            self.checkpoint_timer.stop()
+
+        if self.unwritten_pages:
+            terminal.warning(
+                f"{len(self.unwritten_pages)} pages have listings that weren't saved,"
+                " they are crawled again on restart"
+            )
+
+        self._save_checkpoint()
+
+    def _await_write(self, shard: ListingShard, page: int, items: list[ListingItem]):
+        """Marks the page crawled once all of its items are written."""
+        listing_ids = {str(item[ListingItem.CONTAINER_ID[i.NAME]]) for item in items}
+        if not listing_ids:
+            self._page_written((shard.key, page))
+            return
+
+        self.unwritten_pages[(shard.key, page)] = listing_ids
+        for listing_id in listing_ids:
+            self.pages_by_listing_id.setdefault(listing_id, set()).add((shard.key, page))
+
+    def _rows_written(self, pipeline, ids: list):
+        if not getattr(pipeline, "WRITES_LISTINGS", False):
+            return
+
+        for listing_id in ids:
+            for page_key in self.pages_by_listing_id.pop(str(listing_id), ()):
+                unwritten = self.unwritten_pages[page_key]
+                unwritten.discard(str(listing_id))
+                if not unwritten:
+                    del self.unwritten_pages[page_key]
+                    self._page_written(page_key)
+
+    def _page_written(self, page_key: tuple[str, int]):
+        shard_key, page = page_key
+        shard = self.shards[shard_key]
+        shard.crawled_pages.add(page)
+        if shard.done:
+            terminal.info(f"Shard {shard.key} done, {shard.last_page} pages")
+
+    def _split(self, shard: ListingShard, last_page: int):
+        halves = shard.halves()
+        terminal.info(
+            f"Shard {shard.key} has {last_page} pages, splitting it into"
+            f" {halves[0].key} and {halves[1].key}"
+        )
+
+        shard.is_split = True
+        for half in halves:
+            self.shards[half.key] = half
+            yield self._page_request(half, 1)
+
+    def _page_request(self, shard: ListingShard, page: int) -> Request:
+        return Request(
+            url=get_page_url(shard.url, page),
+            callback=self.parse,
+            priority=-page,
+            meta={"shard": shard.key, "page": page},
+        )
+
+    def _save_checkpoint(self):
+        write_checkpoint(self.checkpoint_path, self.shards)
+
+        crawled_pages = sum(len(shard.crawled_pages) for shard in self.shards.values())
+        done = sum(shard.done for shard in self.shards.values())
+        terminal.info(
+            f"Checkpoint: {done} of {len(self.shards)} shards done, {crawled_pages} pages crawled"
+        )
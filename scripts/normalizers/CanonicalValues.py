@@ -0,0 +1,61 @@
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Callable
+
+KEY_SEPARATORS_RE = re.compile(r"[-_\s\.]+")
+
+
+@lru_cache(maxsize=65536)
+def comparison_key(text: str) -> str:
+    """
+    Key shared by spellings of the same word: accents, case, whitespace and -_. are dropped,
+    so "Citroën", "citroen" and "Mercedes-Benz", "MERCEDES BENZ" meet under one key.
+    """
+    normalized = unicodedata.normalize("NFD", str(text).strip())
+    ascii_text = "".join(c for c in normalized if unicodedata.category(c) != "Mn")
+
+    return KEY_SEPARATORS_RE.sub("", ascii_text.lower())
+
+
+class CanonicalValues:
+    """
+    Known values of one column with their frequencies, grouped by comparison_key, and the
+    canonical spelling chosen for every key.
+
+    It is loaded once from the database and kept up to date with add() as batches are
+    normalized, so a batch is matched against it in time linear in the batch's size.
+
+    Example:
+        >>> values = CanonicalValues({"BMW": 3, "Bmw": 1}, StringNormalizer().choose_best_db_format)
+        >>> values.best[comparison_key("bmw")]
+        'BMW'
+    """
+
+    def __init__(self, frequencies: dict, choose_best: Callable[[list, dict], str]):
+        """
+        Args:
+            frequencies (dict): known value -> number of rows holding it
+            choose_best (callable): picks the canonical value out of the known values of
+                one key, given the frequencies
+        """
+        self.frequencies = {}
+        self.by_key: dict[str, list] = {}
+        self.best: dict[str, str] = {}
+        self.choose_best = choose_best
+        self.add(frequencies)
+
+    def add(self, counts: dict):
+        """Counts new rows of values in, choosing the canonical value again for their keys."""
+        touched = set()
+        for value, count in counts.items():
+            key = comparison_key(value)
+            if value not in self.frequencies:
+                self.by_key.setdefault(key, []).append(value)
+                self.frequencies[value] = 0
+
+            self.frequencies[value] += count
+            touched.add(key)
+
+        for key in touched:
+            self.best[key] = self.choose_best(self.by_key[key], self.frequencies)
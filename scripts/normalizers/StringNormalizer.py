@@ -1,17 +1,33 @@
-import re
-import unicodedata
-from collections import Counter
-from difflib import SequenceMatcher
-from scripts.utils.DbUtil import DbConnector
+from itertools import islice
+from scripts.normalizers.CanonicalValues import CanonicalValues, comparison_key
+from scripts.normalizers.TrigramIndex import TrigramIndex
+from scripts.parsers.ParseMemo import MISSING, ParseMemo
+from scripts.utils.DbUtil import DbConnector, postgres_upsert
+from scripts.utils.LoggerUtil import Logger
 import pandas as pd
-from sqlalchemy import text
-from scripts.shared.Models import Base
+from sqlalchemy import select, text
+from scripts.shared.Models import Base, NormalizationAlias
 
 
 class StringNormalizer:
-    def __init__(self):
+    ALIAS_CACHE_SIZE = 100_000
+
+    def __init__(self, persist_aliases: bool = True):
+        """
+        Args:
+            persist_aliases (bool): reuse the decisions stored in normalization_alias and
+                store the new ones there. Without it, decisions live only in memory.
+        """
         self.engine = DbConnector().get_engine()
         self.session = DbConnector().get_session()
+        self.log = Logger(self.__class__.__name__)
+        self.canonical: dict[tuple, CanonicalValues] = {}
+        self.fuzzy_indexes: dict[tuple, TrigramIndex] = {}
+        self.persist_aliases = persist_aliases
+        # (table name, column name, raw value) -> canonical value
+        self.alias_cache = ParseMemo(self.ALIAS_CACHE_SIZE)
+        # New decisions not in normalization_alias yet, same keys
+        self.unsaved_aliases: dict[tuple, str] = {}
 
     def capitalize_column_first_char(self, column: "pd.Series[str]") -> "pd.Series[str]":
         return column.map(
@@ -30,90 +46,140 @@ class StringNormalizer:
         - Matches against existing database values for consistency
 
         Returns the most common variant of each normalized word, preferring existing database values.
-        """
 
-        def normalize_text(text):
-            """Basic text normalization"""
-            if pd.isna(text):
-                return text
-
-            text = str(text).strip()
-            if not text:
-                return text
+        Existing values are read once and kept in memory (see CanonicalValues), every batch
+        is grouped by comparison key once and applied with a single Series.map, so the cost
+        grows with the batch, not with the table.
 
-            normalized = unicodedata.normalize("NFD", text)
-            ascii_text = "".join(c for c in normalized if unicodedata.category(c) != "Mn")
-
-            return ascii_text
-
-        def create_comparison_key(text):
-            """Create a key for comparing similar words"""
-            if pd.isna(text):
-                return text
-
-            normalized = normalize_text(text)
-            key = re.sub(r"[-_\s\.]+", "", normalized.lower())
-            return key
+        A value normalized once keeps its canonical value: decisions are stored in
+        normalization_alias and reused through an in-process LRU cache, only values never
+        seen before go through the matching. New decisions are stored once the parser saved
+        the batch they were made for, see take_unsaved_aliases.
+        """
 
-        def similarity_ratio(a, b):
-            """Calculate similarity ratio between two strings"""
-            return SequenceMatcher(None, a, b).ratio()
+        canonical = self._canonical_values(table, column_name)
 
-        db_values_freq = self._get_existing_values(table, column_name)
-        db_values = list(db_values_freq.keys())
-        
         valid_mask = column.notna() & (column.str.strip() != "")
         valid_values = column[valid_mask]
 
         if len(valid_values) == 0:
             return column
 
-        all_values = list(set(valid_values.tolist() + db_values))
+        normalization_map, unseen = self._get_aliases(table, column_name, valid_values.unique())
 
         key_to_originals = {}
-        for value in all_values:
-            key = create_comparison_key(value)
-            if key not in key_to_originals:
-                key_to_originals[key] = []
-            key_to_originals[key].append(value)
+        for value in unseen:
+            key_to_originals.setdefault(comparison_key(value), []).append(value)
 
-        normalization_map = {}
+        # Unseen spellings follow the stored decision of a spelling in the same batch
+        known_by_key = {comparison_key(value): alias for value, alias in normalization_map.items()}
 
+        new_aliases = {}
         for key, originals in key_to_originals.items():
-            if len(originals) == 1:
-                normalization_map[originals[0]] = originals[0]
-            else:
-                db_candidates = [val for val in originals if val in db_values]
-                column_candidates = [val for val in originals if val in valid_values.tolist()]
-
-                if db_candidates:
-                    if len(db_candidates) == 1:
-                        best_word = db_candidates[0]
-                    else:
-                        best_word = self.choose_best_db_format(db_candidates, db_values_freq)
-                else:
-                    column_freq_counter = Counter([val for val in originals if val in valid_values.tolist()])
-                    
-                    if column_freq_counter:
-                        most_common = column_freq_counter.most_common()
-                        max_freq = most_common[0][1]
-                        top_candidates = [word for word, freq in most_common if freq == max_freq]
-                    else:
-                        top_candidates = originals
-
-                    best_word = self.choose_best_format(top_candidates)
-
-                for original in originals:
-                    if original in valid_values.tolist():
-                        normalization_map[original] = best_word
+            best_word = canonical.best.get(key, known_by_key.get(key))
+            if best_word is None:
+                best_word = self.choose_best_format(originals)
+
+            for original in originals:
+                new_aliases[original] = best_word
+
+        self._remember_aliases(table, column_name, new_aliases)
+        normalization_map.update(new_aliases)
 
         result = column.copy()
-        for original, normalized in normalization_map.items():
-            if original in valid_values.tolist():
-                result = result.replace(original, normalized)
+        result[valid_mask] = valid_values.map(normalization_map)
+
+        # The batch is saved after this, so its values count as existing from now on
+        canonical.add(result[valid_mask].value_counts().to_dict())
 
         return result
 
+    def _canonical_values(self, table: Base, column_name: str) -> CanonicalValues:
+        """Existing values of the column, read from the database once per normalizer."""
+        cache_key = (table.__tablename__, column_name)
+        if cache_key not in self.canonical:
+            self.canonical[cache_key] = CanonicalValues(
+                self._get_existing_values(table, column_name), self.choose_best_db_format
+            )
+
+        return self.canonical[cache_key]
+
+    def _get_aliases(self, table: Base, column_name: str, values) -> tuple[dict, list]:
+        """
+        Returns the known canonical values of values, from the LRU cache or else from
+        normalization_alias, and the values that have none.
+        """
+        aliases = {}
+        missing = []
+        for value in values:
+            canonical_value = self.alias_cache.get((table.__tablename__, column_name, value))
+            if canonical_value is MISSING:
+                missing.append(value)
+            else:
+                aliases[value] = canonical_value
+
+        if missing and self.persist_aliases:
+            stored = self._load_aliases(table, column_name, missing)
+            for value, canonical_value in stored.items():
+                self.alias_cache.put((table.__tablename__, column_name, value), canonical_value)
+
+            aliases.update(stored)
+            missing = [value for value in missing if value not in stored]
+
+        return aliases, missing
+
+    def _load_aliases(self, table: Base, column_name: str, values: list) -> dict:
+        try:
+            alias = NormalizationAlias
+            query = select(alias.raw_value, alias.canonical_value).where(
+                alias.table_name == table.__tablename__,
+                alias.column_name == column_name,
+                alias.raw_value.in_(values),
+            )
+            with self.engine.connect() as conn:
+                return dict(conn.execute(query).tuples().all())
+
+        except Exception as e:
+            self.log.warning(f"Could not fetch normalization aliases, using memory only: {e}")
+            self.persist_aliases = False
+            return {}
+
+    def _remember_aliases(self, table: Base, column_name: str, aliases: dict):
+        for value, canonical_value in aliases.items():
+            key = (table.__tablename__, column_name, value)
+            self.alias_cache.put(key, canonical_value)
+            if self.persist_aliases:
+                self.unsaved_aliases[key] = canonical_value
+
+    def take_unsaved_aliases(self) -> dict[tuple, str]:
+        """
+        Returns the decisions made since the last call and forgets them. The parser passes
+        them to save_aliases after the batch they were made for is saved, so an alias never
+        outlives a failed batch.
+        """
+        aliases, self.unsaved_aliases = self.unsaved_aliases, {}
+        return aliases
+
+    def save_aliases(self, aliases: dict[tuple, str]):
+        """Stores decisions from take_unsaved_aliases, of this or another process."""
+        if not aliases or not self.persist_aliases:
+            return
+
+        keys = list(aliases)
+        df = pd.DataFrame(
+            {
+                NormalizationAlias.table_name.name: [key[0] for key in keys],
+                NormalizationAlias.column_name.name: [key[1] for key in keys],
+                NormalizationAlias.raw_value.name: [key[2] for key in keys],
+                NormalizationAlias.canonical_value.name: list(aliases.values()),
+            }
+        )
+        try:
+            postgres_upsert(table=NormalizationAlias, conn=self.session, df=df, update_time=True)
+        except Exception as e:
+            self.log.warning(f"Could not save normalization aliases, using memory only: {e}")
+            self.persist_aliases = False
+
     def _get_existing_values(self, table: Base, column_name: str) -> dict:
         """Get existing values from database with their frequencies"""
         try:
@@ -135,7 +201,7 @@ class StringNormalizer:
             return db_values_freq
             
         except Exception as e:
-            print(f"Warning: Could not fetch existing values from database: {e}")
+            self.log.warning(f"Could not fetch existing values from database: {e}")
             return {}
 
     def choose_best_db_format(self, candidates, db_frequencies):
@@ -190,28 +256,33 @@ class StringNormalizer:
         """
         Enhanced normalization that also considers fuzzy matching against database values
         for cases where exact key matching isn't sufficient.
+
+        Only the few values a TrigramIndex shortlists are scored with SequenceMatcher, and
+        every distinct text is matched once per batch.
         """
+        index = self._fuzzy_index(table, column_name)
         result = self.normalize_column_words(column, table, column_name)
         
-        db_values_freq = self._get_existing_values(table, column_name)
-        db_values = list(db_values_freq.keys())
-        
-        if not db_values:
+        if not len(index):
             return result
-        
+
+        matches = {}
+
         def fuzzy_match_to_db(text):
             if pd.isna(text) or not isinstance(text, str):
                 return text
-                
-            best_match = None
-            best_score = 0
-            
-            for db_value in db_values:
-                score = SequenceMatcher(None, text.lower(), db_value.lower()).ratio()
-                if score > best_score and score >= similarity_threshold:
-                    best_score = score
-                    best_match = db_value
-            
-            return best_match if best_match else text
+
+            if text not in matches:
+                matches[text] = index.best_match(text, similarity_threshold) or text
+
+            return matches[text]
         
-        return result.apply(fuzzy_match_to_db)
\ No newline at end of file
+        return result.apply(fuzzy_match_to_db)
+
+    def _fuzzy_index(self, table: Base, column_name: str) -> TrigramIndex:
+        """Trigram index over the existing values, extended with the ones added since."""
+        canonical = self._canonical_values(table, column_name)
+        index = self.fuzzy_indexes.setdefault((table.__tablename__, column_name), TrigramIndex())
+        index.add_many(islice(canonical.frequencies, len(index), None))
+
+        return index
@@ -0,0 +1,150 @@
+from difflib import SequenceMatcher
+from typing import Iterable, Optional
+
+import numpy as np
+
+
+def trigrams(text: str) -> set[str]:
+    """Lowercase trigrams of text, padded like pg_trgm so short words get trigrams too."""
+    padded = f"  {text.lower()} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    """
+    Inverted trigram index over known values, shortlisting the few values worth scoring
+    with SequenceMatcher instead of scoring every one of them.
+
+    A lookup counts the trigrams the text shares with every value through the postings of
+    its trigrams, ranks values by their Dice coefficient and keeps the best SHORTLIST_SIZE
+    whose length allows the threshold at all. Trigrams found in more than
+    COMMON_TRIGRAM_SHARE of the values are skipped (beyond the MIN_TRIGRAMS rarest of the
+    text), they match almost everything and would cost most of the lookup.
+
+    Example:
+        >>> index = TrigramIndex(["Mercedes-Benz", "Citroën", "Volkswagen"])
+        >>> index.best_match("Mercedes Bens", threshold=0.8)
+        'Mercedes-Benz'
+    """
+
+    SHORTLIST_SIZE = 10
+    COMMON_TRIGRAM_SHARE = 0.01
+    MIN_TRIGRAMS = 8
+
+    def __init__(self, values: Iterable[str] = ()):
+        self.values: list[str] = []
+        self.lowered: list[str] = []
+        self.postings: dict[str, list[int]] = {}
+        self.trigram_counts: list[int] = []
+        # numpy copies of postings and sizes, rebuilt after values are added
+        self._posting_arrays: dict[str, np.ndarray] = {}
+        self._sizes: Optional[tuple[np.ndarray, np.ndarray]] = None
+        self.add_many(values)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def add_many(self, values: Iterable[str]):
+        for value in values:
+            self.add(value)
+
+    def add(self, value: str):
+        position = len(self.values)
+        grams = trigrams(value)
+
+        self.values.append(value)
+        self.lowered.append(value.lower())
+        self.trigram_counts.append(len(grams))
+        for gram in grams:
+            self.postings.setdefault(gram, []).append(position)
+            self._posting_arrays.pop(gram, None)
+
+        self._sizes = None
+
+    def shortlist(self, text: str, threshold: float = 0.0) -> list[int]:
+        """
+        Positions of the values most similar to text by shared trigrams, the most similar
+        first. With a threshold, values too short or too long to reach a SequenceMatcher
+        ratio of threshold are left out.
+        """
+        text_grams = trigrams(text)
+        grams = sorted((g for g in text_grams if g in self.postings), key=self._posting_size)
+        if not grams:
+            return []
+
+        common = self.COMMON_TRIGRAM_SHARE * len(self.values)
+        arrays = [
+            self._posting_array(gram)
+            for rank, gram in enumerate(grams)
+            if rank < self.MIN_TRIGRAMS or self._posting_size(gram) <= common
+        ]
+        positions, shared = np.unique(np.concatenate(arrays), return_counts=True)
+
+        trigram_counts, lengths = self._value_sizes()
+        dice = 2 * shared / (trigram_counts[positions] + len(text_grams))
+
+        if threshold > 0:
+            # ratio is at most 2 * min(len) / (len(a) + len(b))
+            length = len(text)
+            value_lengths = lengths[positions]
+            too_short = value_lengths < length * threshold / (2 - threshold)
+            too_long = value_lengths > length * (2 - threshold) / threshold
+            dice[too_short | too_long] = 0
+
+        if len(positions) > self.SHORTLIST_SIZE:
+            best = np.argpartition(dice, -self.SHORTLIST_SIZE)[-self.SHORTLIST_SIZE :]
+        else:
+            best = np.arange(len(positions))
+
+        best = best[dice[best] > 0]
+        return [int(p) for p in positions[best[np.argsort(-dice[best], kind="stable")]]]
+
+    def best_match(self, text: str, threshold: float) -> Optional[str]:
+        """
+        Value with the highest SequenceMatcher ratio to text (case-insensitive) among the
+        shortlist, if it reaches threshold. Ties go to the value added first.
+        """
+        text = text.lower()
+        best_position = None
+        best_score = 0
+
+        # The most similar candidates come first, so the cheap upper bounds of the ratio
+        # rule most of the others out
+        for position in self.shortlist(text, threshold):
+            matcher = SequenceMatcher(None, text, self.lowered[position])
+            bar = max(threshold, best_score)
+            if matcher.real_quick_ratio() < bar or matcher.quick_ratio() < bar:
+                continue
+
+            score = matcher.ratio()
+            if score < bar:
+                continue
+
+            if (
+                best_position is None
+                or score > best_score
+                or (score == best_score and position < best_position)
+            ):
+                best_score = score
+                best_position = position
+
+        return None if best_position is None else self.values[best_position]
+
+    def _posting_size(self, gram: str) -> int:
+        return len(self.postings[gram])
+
+    def _posting_array(self, gram: str) -> np.ndarray:
+        if gram not in self._posting_arrays:
+            self._posting_arrays[gram] = np.array(self.postings[gram], dtype=np.int64)
+
+        return self._posting_arrays[gram]
+
+    def _value_sizes(self) -> tuple[np.ndarray, np.ndarray]:
+        """Trigram count and length of every value."""
+        if self._sizes is None:
+            self._sizes = (
+                np.array(self.trigram_counts, dtype=np.int64),
+                np.array([len(value) for value in self.lowered], dtype=np.int64),
+            )
+
+        return self._sizes
@@ -1,10 +1,93 @@
+import os
 import re
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import closing
+from datetime import timedelta
+from functools import lru_cache
 from typing import Optional
 
 import pandas as pd
-
+from sqlalchemy import Select, and_, exists, func, not_, or_, select
+
+from scripts.parsers.ParseMemo import MISSING, ParseMemo
+from scripts.parsers.WordMatcher import (
+    CASE_FOLD_UNSAFE_RE,
+    REGEX_FLAGS,
+    REGEX_META_RE,
+    WordMatcher,
+)
+from scripts.shared.Models import Base, ParserWatermark, RawListing
 from scripts.utils.DbUtil import DbConnector as db
+from scripts.utils.DbUtil import postgres_upsert
 from scripts.utils.LoggerUtil import Logger
+from scripts.utils.TimingUtil import StepTimer
+
+WHITESPACE_RE = re.compile(r"\s+", flags=re.UNICODE)
+NUMBER_SEPARATORS_RE = re.compile(r"[\s,\.]")
+EDGE_NON_WORD_RE = re.compile(r"^\W+|\W+$", flags=re.UNICODE)
+
+
+@lru_cache(maxsize=256)
+def _compile_extraction(pattern: str) -> re.Pattern:
+    """Wraps pattern in an outer group, so group 1 is the full match and group 2 the capture."""
+    return re.compile(f"({pattern})", REGEX_FLAGS)
+
+
+def _remove_literal(text: str, match: str) -> str:
+    """
+    Removes every case-insensitive occurrence of match (or of its stripped form) from text.
+    Same result as re.sub over the escaped/raw alternation, for texts and matches that passed
+    the REGEX_META_RE and CASE_FOLD_UNSAFE_RE checks.
+    """
+    stripped = match.strip()
+    if not stripped:
+        return text
+
+    lowered, low_stripped, low_match = text.lower(), stripped.lower(), match.lower()
+    pieces = []
+    pos = 0
+    while True:
+        start_stripped = lowered.find(low_stripped, pos)
+        if start_stripped == -1:
+            break
+
+        start_match = lowered.find(low_match, pos, start_stripped + len(low_match) - 1)
+        if start_match == -1:
+            start, end = start_stripped, start_stripped + len(stripped)
+        else:
+            start, end = start_match, start_match + len(match)
+
+        pieces.append(text[pos:start])
+        pos = end
+
+    pieces.append(text[pos:])
+    return "".join(pieces)
+
+
+_worker_parser = None
+
+
+def _init_worker(parser_cls: type, options: dict):
+    """Creates the parser instance used by a pool worker process."""
+    global _worker_parser
+    _worker_parser = parser_cls(**options)
+
+
+def _parse_in_worker(df: pd.DataFrame) -> tuple:
+    """
+    Returns the parsed batch with the worker's pid, its memo cache totals, the step
+    timings and the new normalization aliases of this batch.
+    """
+    df_parsed = _worker_parser._parse(df)
+    return (
+        df_parsed,
+        os.getpid(),
+        _worker_parser._memo_stats(),
+        _worker_parser.timer.pop(),
+        _worker_parser._take_new_aliases(),
+    )
 
 
 class AbstractParser:
@@ -14,18 +97,257 @@ class AbstractParser:
     STATUS_ERROR = "error"
     STATUS_FINISHED = "finished"
 
-    def __init__(self):
+    IN_FLIGHT_PER_WORKER = 2
+    # raw_listing.updated_at is the start of the writing transaction, which may commit after
+    # a later run read its watermark. Runs stop this long before now() and read again from
+    # this long before their watermark, the hash check skips rows parsed already.
+    WATERMARK_LAG = timedelta(minutes=5)
+
+    def __init__(
+        self,
+        vectorized: bool = True,
+        workers: int = 1,
+        streaming: bool = False,
+        incremental: bool = False,
+        memo_size: int = 0,
+        prefetch: int = 0,
+        source=None,
+        sink=None,
+        reparse: bool = False,
+    ):
+        """
+        Args:
+            reparse (bool): parse the selected rows even when their raw section hash equals
+                the raw_hash they were last parsed from, e.g. after a parser changed
+            source (optional): reads raw_listing rows from files instead of the database,
+                e.g. a ParquetSource. Anything with count() and batches(columns, batch_size)
+            sink (optional): writes parsed frames to files instead of upserting them,
+                e.g. a ParquetSink. Anything with save(table, df, update_time) and close()
+        """
+        if incremental and (source is not None or sink is not None):
+            raise ValueError("Incremental runs read and save through the database only.")
+        if workers > 1 and prefetch > 0:
+            raise ValueError("Prefetching only applies to single-process runs, not to workers.")
+
         self.engine = db().get_engine()
         self.session = db().get_session()
         self.log = Logger(self.__class__.__name__)
+        self.vectorized = vectorized
+        self.workers = max(1, workers)
+        self.streaming = streaming
+        self.incremental = incremental
+        self._watermark_range = None
+        self.memo_size = memo_size
+        self.memo = ParseMemo(memo_size) if memo_size > 0 else None
+        self.prefetch = max(0, prefetch)
+        self.timer = StepTimer()
+        self.source = source
+        self.sink = sink
+        self.reparse = reparse
 
     def get_total_records(self, only_missing: bool):
+        if self.source is not None:
+            self._check_source(only_missing)
+            return self.source.count()
+
+        query = select(func.count(RawListing.id))
+        for condition in self._raw_filters(self._tables(), only_missing):
+            query = query.where(condition)
+
+        result = db().get_session().execute(query).scalar()
+        return int(result)
+
+    def _tables(self) -> list[Base]:
+        """Parsed tables the parser saves to."""
+        raise NotImplementedError()
+
+    def _raw_hashes(self) -> list:
+        """RawListing hash columns of the raw sections parsed into _tables(), in the same order."""
+        raise NotImplementedError()
+
+    def _get_text_query(
+        self, batch_size: Optional[int], after_id: Optional[int], only_missing: bool
+    ) -> Select:
         raise NotImplementedError()
 
     def _get_text_to_parse_as_df(
-        self, batch_size: int, offset: int, only_missing: bool
+        self, batch_size: int, after_id: Optional[int], only_missing: bool
     ) -> pd.DataFrame:
-        raise NotImplementedError()
+        query = self._get_text_query(batch_size, after_id, only_missing)
+
+        return pd.read_sql_query(sql=query, con=self.engine)
+
+    def _stream_text_to_parse_as_df(self, batch_size: int, only_missing: bool):
+        """
+        Yields batches from one server-side cursor, so the whole run costs a single query
+        plan and one sequential scan. The cursor's transaction stays open until the run
+        ends; rows saved meanwhile are not seen by it.
+        """
+        query = self._get_text_query(None, None, only_missing)
+
+        with self.engine.connect() as conn:
+            conn = conn.execution_options(yield_per=batch_size)
+            for df in pd.read_sql_query(sql=query, con=conn, chunksize=batch_size):
+                if not df.empty:
+                    yield df
+
+    def _iter_text_to_parse(self, batch_size: int, only_missing: bool):
+        """Yields the batches to parse, streamed or paged by id, timing every read."""
+        if self.source is not None:
+            self._check_source(only_missing)
+            batches = self.source.batches(self._source_columns(), batch_size)
+        elif self.streaming:
+            batches = self._stream_text_to_parse_as_df(batch_size, only_missing)
+        else:
+            batches = self._page_text_to_parse_as_df(batch_size, only_missing)
+
+        with closing(batches):
+            while True:
+                start = time.perf_counter()
+                df = next(batches, None)
+                if df is None:
+                    return
+
+                self.timer.add(self._step_name("fetch"), time.perf_counter() - start, len(df))
+                yield df
+
+    def _source_columns(self) -> dict[str, str]:
+        """
+        Maps the columns of the parser's raw_listing query to the raw_listing columns they
+        read, so a file source yields the same frames as the database.
+        """
+        query = self._get_text_query(None, None, False)
+        return {
+            column.name: getattr(column, "element", column).name
+            for column in query.selected_columns
+        }
+
+    def _check_source(self, only_missing: bool):
+        if only_missing:
+            raise ValueError("only_missing compares with the parsed tables, it needs the database.")
+
+    def _page_text_to_parse_as_df(self, batch_size: int, only_missing: bool):
+        last_id = None
+        while True:
+            df = self._get_text_to_parse_as_df(batch_size, last_id, only_missing)
+            if df.empty:
+                return
+            last_id = int(df["id"].iloc[-1])
+
+            yield df
+
+    def _select_raw_text(
+        self,
+        raw_columns: list,
+        tables: list[Base],
+        batch_size: Optional[int],
+        after_id: Optional[int],
+        only_missing: bool,
+    ) -> Select:
+        """
+        Builds the keyset-paginated read of raw_listing columns:
+        WHERE id > after_id ORDER BY id LIMIT batch_size. Every batch is an index range
+        scan on raw_listing_pkey, however far into the table the run is.
+
+        Args:
+            raw_columns (list): RawListing columns to read next to the id
+            tables (list): parsed tables, in only_missing mode a row is read when it is
+                missing from any of them
+            batch_size (int, optional): batch size, None reads everything in one query
+            after_id (int, optional): last id of the previous batch, None for the first one
+        """
+        query = select(RawListing.id, *raw_columns)
+
+        if after_id is not None:
+            query = query.where(RawListing.id > after_id)
+
+        for condition in self._raw_filters(tables, only_missing):
+            query = query.where(condition)
+
+        query = query.order_by(RawListing.id)
+
+        if batch_size is not None:
+            query = query.limit(batch_size)
+
+        return query
+
+    def _raw_filters(self, tables: list[Base], only_missing: bool) -> list:
+        """
+        WHERE clauses choosing the raw_listing rows to parse. A row is read when its raw
+        text hash differs from the one it was last parsed from (unless reparse is set), in
+        only_missing mode when it is missing from any of the tables, and in incremental
+        mode only when it was also updated after the parser's watermark (less
+        WATERMARK_LAG). With only_missing and incremental, a row is read when either holds.
+        """
+        filters = []
+        selected = self._missing_from(tables) if only_missing else []
+        changed = [] if self.reparse else [or_(*self._changed_from(tables))]
+
+        if self.incremental:
+            since, until = self._get_watermark_range()
+            if until is not None:
+                filters.append(RawListing.updated_at <= until)
+
+            if since is None:
+                # No watermark yet, the first incremental run checks every row's hash
+                selected = changed
+            else:
+                selected.append(and_(RawListing.updated_at > since - self.WATERMARK_LAG, *changed))
+        elif not only_missing:
+            selected = changed
+
+        if selected:
+            filters.append(or_(*selected))
+
+        return filters
+
+    def _missing_from(self, tables: list[Base]) -> list:
+        return [not_(exists(select(1).where(table.id == RawListing.id))) for table in tables]
+
+    def _changed_from(self, tables: list[Base]) -> list:
+        """Rows with no parsed counterpart carrying the current hash of their raw section."""
+        return [
+            not_(
+                exists(
+                    select(1).where(
+                        table.id == RawListing.id, table.raw_hash.is_not_distinct_from(raw_hash)
+                    )
+                )
+            )
+            for table, raw_hash in zip(tables, self._raw_hashes(), strict=True)
+        ]
+
+    def _get_watermark_range(self) -> tuple:
+        """
+        Returns (since, until) for an incremental run: the stored watermark of this parser
+        and WATERMARK_LAG before the database's now() when the run started. Rows updated
+        later are left to the next run.
+        """
+        if self._watermark_range is None:
+            with db().get_session() as session:
+                since = session.execute(
+                    select(ParserWatermark.watermark).where(
+                        ParserWatermark.parser_name == self.__class__.__name__
+                    )
+                ).scalar()
+                until = session.execute(select(func.now() - self.WATERMARK_LAG)).scalar()
+
+            self._watermark_range = (since, until)
+
+        return self._watermark_range
+
+    def _save_watermark(self):
+        """Moves the watermark to the end of the finished incremental run."""
+        if not self.incremental:
+            return
+
+        _, until = self._get_watermark_range()
+        if until is None:
+            return
+
+        df = pd.DataFrame([{"parser_name": self.__class__.__name__, "watermark": until}])
+        postgres_upsert(table=ParserWatermark, conn=self.session, df=df, update_time=True)
+        self.log.info(f"Watermark moved to {until}")
 
     def _save_parsed_text_df(self, df_parsed: pd.DataFrame):
         raise NotImplementedError()
@@ -53,23 +375,12 @@ class AbstractParser:
         if not isinstance(text, str):
             return text
 
-        if isinstance(words_to_remove, str):
-            words_to_remove = re.split(r"[^a-zA-Z0-9.\s]+", words_to_remove)
-            words_to_remove = [word for w in words_to_remove for word in w.split()]
-
-        escaped_words = [
-            re.escape(word.strip()) for word in words_to_remove if word and isinstance(word, str)
-        ]
+        matcher = WordMatcher.for_words(words_to_remove, keep_blank=True)
 
-        if not escaped_words:
+        if matcher.regex is None:
             return text.strip(self.STRIP_EXP)
 
-        full_list = escaped_words + words_to_remove
-
-        pattern = r"(?:" + "|".join(full_list) + r")"
-
-        result = re.sub(pattern, "", text, flags=re.IGNORECASE | re.UNICODE)
-        result = re.sub(r"\s+", " ", result, flags=re.UNICODE).strip()
+        result = WHITESPACE_RE.sub(" ", matcher.sub(text)).strip()
 
         return result.strip(self.STRIP_EXP)
 
@@ -96,21 +407,12 @@ class AbstractParser:
         """
         text = str(row[from_col])
 
-        if isinstance(words_to_remove, str):
-            parts = re.split(r"[^a-zA-Z0-9.\s]+", words_to_remove)
-            words_to_remove = [w for part in parts for w in part.split() if w]
+        matcher = WordMatcher.for_words(words_to_remove, keep_blank=False)
 
-        escaped_words = [
-            re.escape(w.strip()) for w in words_to_remove if isinstance(w, str) and w.strip()
-        ]
-
-        if not escaped_words:
+        if matcher.regex is None:
             return text
 
-        pattern = r"(?:" + "|".join(escaped_words + words_to_remove) + r")"
-        result = re.sub(pattern, "", text, flags=re.IGNORECASE | re.UNICODE)
-        result = re.sub(r"\s+", " ", result, flags=re.UNICODE).strip()
-        return result
+        return WHITESPACE_RE.sub(" ", matcher.sub(text)).strip()
 
     def _extract_pattern(
         self, row: pd.Series, col_from: str, col_to: str, pattern: str, cast: Optional[type] = None
@@ -142,20 +444,7 @@ class AbstractParser:
             return pd.Series([None, working], index=[col_to, col_from])
 
         full_match = match.group(0)
-        captured = match.group(1)
-
-        if cast and captured:
-            try:
-                if cast in [float, int]:
-                    cleaned = re.sub(r"[\s,\.]", "", captured)
-                    captured = cast(cleaned)
-                else:
-                    captured = cast(captured)
-            except (ValueError, TypeError):
-                captured = None
-
-        if isinstance(captured, str):
-            captured = re.sub(r"^\W+|\W+$", "", captured, flags=re.UNICODE).strip(self.STRIP_EXP)
+        captured = self._cast_captured(match.group(1), cast)
 
         working = self._remove_words_from_string(working, [full_match])
 
@@ -192,9 +481,264 @@ class AbstractParser:
 
         return pd.Series([False, working], index=[col_to, col_from])
 
+    def _cast_captured(self, captured: Optional[str], cast: Optional[type] = None):
+        """
+        Casts a captured group the way _extract_pattern does. Numbers lose their separators,
+        strings are trimmed of non-word characters and STRIP_EXP. Failed casts become None.
+        """
+        if cast and captured:
+            try:
+                if cast in [float, int]:
+                    cleaned = NUMBER_SEPARATORS_RE.sub("", captured)
+                    captured = cast(cleaned)
+                else:
+                    captured = cast(captured)
+            except (ValueError, TypeError):
+                captured = None
+
+        if isinstance(captured, str):
+            captured = EDGE_NON_WORD_RE.sub("", captured).strip(self.STRIP_EXP)
+
+        return captured
+
+    def _remove_match(self, text: str, match: str):
+        """
+        Same as _remove_words_from_string(text, [match]). Plain-text matches are removed
+        with str.find instead of compiling a regex for every row.
+        """
+        if (
+            match.strip()
+            and REGEX_META_RE.search(match) is None
+            and CASE_FOLD_UNSAFE_RE.search(text) is None
+        ):
+            result = WHITESPACE_RE.sub(" ", _remove_literal(text, match)).strip()
+            return result.strip(self.STRIP_EXP)
+
+        return self._remove_words_from_string(text, [match])
+
+    def _working_column(self, df: pd.DataFrame, col: str) -> pd.Series:
+        return pd.Series([str(value).strip() for value in df[col]], index=df.index, dtype=object)
+
+    def _assign_split_column(
+        self, df: pd.DataFrame, col_from: str, col_to: str, values: list, texts: list
+    ):
+        df[[col_to, col_from]] = pd.DataFrame({col_to: values, col_from: texts}, index=df.index)
+
+    def _extract_pattern_column(
+        self,
+        df: pd.DataFrame,
+        col_from: str,
+        col_to: str,
+        pattern: str,
+        cast: Optional[type] = None,
+    ):
+        r"""
+        Column-wise _extract_pattern. Sets df[col_to] to the (cast) captured group and removes
+        the match from df[col_from], in place.
+
+        In vectorized mode the pattern is compiled once and matched with Series.str.extract,
+        otherwise every row goes through _extract_pattern.
+
+        Example:
+            self._extract_pattern_column(df, "raw_summary", "engine_cc", r"(\d+)\s?cm3", float)
+        """
+        with self._step(f"parse: {col_to}", len(df)):
+            if not self.vectorized:
+                df[[col_to, col_from]] = df.apply(
+                    self._extract_pattern, args=(col_from, col_to, pattern, cast), axis=1
+                )
+                return
+
+            working = self._working_column(df, col_from)
+            groups = working.str.extract(_compile_extraction(pattern), expand=True)
+
+            values, texts = [], []
+            for text, full_match, captured in zip(working, groups[0], groups[1], strict=True):
+                if not isinstance(full_match, str):
+                    values.append(None)
+                    texts.append(text)
+                    continue
+
+                captured = captured if isinstance(captured, str) else None
+                values.append(self._cast_captured(captured, cast))
+                texts.append(self._remove_match(text, full_match))
+
+            self._assign_split_column(df, col_from, col_to, values, texts)
+
+    def _extract_pattern_to_boolean_column(
+        self, df: pd.DataFrame, col_from: str, col_to: str, pattern: str
+    ):
+        """
+        Column-wise _extract_pattern_to_boolean. Sets df[col_to] to whether the pattern was
+        found and removes the match from df[col_from], in place.
+        """
+        with self._step(f"parse: {col_to}", len(df)):
+            if not self.vectorized:
+                df[[col_to, col_from]] = df.apply(
+                    self._extract_pattern_to_boolean, args=(col_from, col_to, pattern), axis=1
+                )
+                return
+
+            working = self._working_column(df, col_from)
+            full_matches = working.str.extract(_compile_extraction(pattern), expand=True)[0]
+
+            values, texts = [], []
+            for text, full_match in zip(working, full_matches, strict=True):
+                if isinstance(full_match, str):
+                    values.append(True)
+                    texts.append(self._remove_match(text, full_match))
+                else:
+                    values.append(False)
+                    texts.append(text)
+
+            self._assign_split_column(df, col_from, col_to, values, texts)
+
+    def _remove_words_from_column(
+        self, df: pd.DataFrame, from_col: str, words_to_remove: str | list[str]
+    ):
+        """
+        Column-wise _remove_words_from_row, in place. In vectorized mode the cached
+        WordMatcher is applied to the whole column with Series.str.replace.
+        """
+        with self._step("parse: remove words", len(df)):
+            if not self.vectorized:
+                df[from_col] = df.apply(
+                    self._remove_words_from_row, args=(from_col, words_to_remove), axis=1
+                )
+                return
+
+            text = pd.Series([str(value) for value in df[from_col]], index=df.index, dtype=object)
+            matcher = WordMatcher.for_words(words_to_remove, keep_blank=False)
+
+            if matcher.regex is None:
+                df[from_col] = text
+                return
+
+            df[from_col] = (
+                text.str.replace(matcher.regex, "", regex=True)
+                .str.replace(WHITESPACE_RE, " ", regex=True)
+                .str.strip()
+            )
+
+    def _raw_column(self):
+        """RawListing column the parser extracts from."""
+        raise NotImplementedError()
+
     def _parse(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Parses a batch read from raw_listing: row by row extraction, then _normalize."""
+        with self._step("parse", len(df)):
+            if self.memo is None:
+                return self._normalize(self._extract(df))
+
+            return self._normalize(self._extract_memoized(df))
+
+    def _extract(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Extracts the parsed columns from the raw text column. Every row's result may only
+        depend on its own raw text, so it can be memoized.
+        """
         raise NotImplementedError()
 
+    def _normalize(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Steps after _extract that depend on the whole batch, they are never memoized."""
+        return df
+
+    def _extract_memoized(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Same as _extract, but rows whose raw text is in the memo cache reuse the cached
+        values. Texts that are not cached are extracted once per batch, however often they
+        repeat in it. Other input columns (id, raw_hash) are passed through as they are.
+        """
+        raw_column = self._raw_column().name
+        keys = [None if pd.isna(text) else text for text in df[raw_column]]
+
+        values = {}
+        missing = {}
+        for position, key in enumerate(keys):
+            if key in values or key in missing:
+                # Repeated in this batch, the first occurrence's result is reused
+                self.memo.hits += 1
+                continue
+
+            cached = self.memo.get(key)
+            if cached is MISSING:
+                missing[key] = position
+            else:
+                values[key] = cached
+
+        if not missing and self.memo.columns is None:
+            # Nothing extracted yet, i.e. an empty batch
+            return self._extract(df)
+
+        passthrough = [c for c in df.columns if c != raw_column]
+
+        if missing:
+            df_missing = df.iloc[list(missing.values())].copy()
+            extracted = self._extract(df_missing)
+            self.memo.columns = list(extracted.columns)
+            columns = [c for c in self.memo.columns if c not in passthrough]
+
+            for key, row in zip(missing, extracted[columns].itertuples(index=False), strict=True):
+                values[key] = tuple(row)
+                self.memo.put(key, values[key])
+        else:
+            # Every row was cached, they are laid out like the extraction they came from
+            columns = [c for c in self.memo.columns if c not in passthrough]
+
+        parsed = pd.DataFrame([values[key] for key in keys], columns=columns, index=df.index)
+        for column in passthrough:
+            parsed[column] = df[column]
+
+        return parsed[self.memo.columns]
+
+    def _step_name(self, name: str) -> str:
+        return f"{self.__class__.__name__} {name}"
+
+    def _step(self, name: str, rows: int = 0):
+        """Times a step of this parser, e.g. with self._step("parse: mileage", len(df))."""
+        return self.timer.step(self._step_name(name), rows)
+
+    def _save(self, df_parsed, rows: int, aliases: Optional[dict] = None):
+        """Saves the parsed batch, then the normalization aliases its parse decided on."""
+        with self._step("save", rows):
+            if self.sink is None:
+                self._save_parsed_text_df(df_parsed)
+            else:
+                for table, df in self._parsed_frames(df_parsed):
+                    self.sink.save(table, df, update_time=True)
+
+            if aliases:
+                self._save_aliases(aliases)
+
+    def _take_new_aliases(self) -> dict:
+        """Normalization aliases decided since the last call, see StringNormalizer."""
+        return {}
+
+    def _save_aliases(self, aliases: dict):
+        """Stores aliases from _take_new_aliases once their batch is saved."""
+
+    def _parsed_frames(self, df_parsed) -> list[tuple]:
+        """Returns the parsed batch as (table, DataFrame) pairs."""
+        return [(self._tables()[0], df_parsed)]
+
+    def _memo_stats(self) -> tuple[int, int]:
+        """Returns (hits, misses) of the memo cache."""
+        if self.memo is None:
+            return 0, 0
+
+        return self.memo.hits, self.memo.misses
+
+    def _log_memo_stats(self, hits: int, misses: int):
+        if not self.memo_size:
+            return
+
+        lookups = hits + misses
+        hit_rate = hits / lookups if lookups else 0.0
+        self.log.info(
+            f"Memo cache: {hits} hits, {misses} misses ({hit_rate:.1%} hit rate),"
+            f" max {self.memo_size} entries"
+        )
+
     def validate_parsing(self, original_df: pd.DataFrame, parsed_df: pd.DataFrame):
         original_ids = set(original_df["id"])
         parsed_ids = set(parsed_df["id"])
@@ -204,22 +748,150 @@ class AbstractParser:
                 f"Missing {len(missing_ids)} IDs after parsing: {list(missing_ids)[:10]} ..."
             )
 
+    def _worker_options(self) -> dict:
+        """Constructor arguments for the parser instances living in pool workers."""
+        return {"vectorized": self.vectorized, "memo_size": self.memo_size}
+
     def run(self, batch_size: int, only_missing: bool, total: int):
-        offset = 0
-        while True:
-            df = self._get_text_to_parse_as_df(batch_size, offset, only_missing)
-            if df.empty or offset > total:
-                break
-            offset += batch_size
+        try:
+            if self.workers > 1:
+                return (yield from self._run_pooled(batch_size, only_missing, total))
+
+            if self.prefetch:
+                return (yield from self._run_pipelined(batch_size, only_missing, total))
+
+            return (yield from self._run_sequential(batch_size, only_missing, total))
+        finally:
+            if self.sink is not None:
+                self.sink.close()
+
+    def _run_sequential(self, batch_size: int, only_missing: bool, total: int):
+        try:
+            with closing(self._iter_text_to_parse(batch_size, only_missing)) as batches:
+                for df in batches:
+                    df_parsed = self._parse(df)
+
+                    self.validate_parsing(df, df_parsed)
+
+                    try:
+                        self._save(df_parsed, len(df), self._take_new_aliases())
+                        yield self.STATUS_PROCESSING
+                    except Exception as e:
+                        self.log.error(f"Failed to save dataframe.\n{e}")
+                        return self.STATUS_ERROR
+        finally:
+            self._log_memo_stats(*self._memo_stats())
+
+        self._save_watermark()
+        return self.STATUS_FINISHED
 
-            df_parsed = self._parse(df)
+    def _run_pipelined(self, batch_size: int, only_missing: bool, total: int):
+        """
+        Same as run, but reads and saves happen in background threads. While batch N is
+        parsed, up to `prefetch` following batches are read and batch N-1 is saved.
 
-            self.validate_parsing(df, df_parsed)
+        There is one reader and one writer thread, so batches are still read and saved one
+        at a time and in order, and a save is confirmed before the next one starts.
+        """
+        batches = self._iter_text_to_parse(batch_size, only_missing)
+        reader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="reader")
+        writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="writer")
+        prefetched = deque()
+        saving = None
 
-            try:
-                self._save_parsed_text_df(df_parsed)
+        try:
+            while True:
+                while len(prefetched) < self.prefetch:
+                    prefetched.append(reader.submit(next, batches, None))
+
+                df = prefetched.popleft().result()
+                if df is None:
+                    break
+
+                df_parsed = self._parse(df)
+
+                self.validate_parsing(df, df_parsed)
+
+                if saving is not None:
+                    if not self._saved(saving):
+                        return self.STATUS_ERROR
+                    yield self.STATUS_PROCESSING
+
+                saving = writer.submit(self._save, df_parsed, len(df), self._take_new_aliases())
+
+            if saving is not None:
+                if not self._saved(saving):
+                    return self.STATUS_ERROR
                 yield self.STATUS_PROCESSING
-            except Exception as e:
-                self.log.error(f"Failed to save dataframe.\n{e}")
-                return self.STATUS_ERROR
+        finally:
+            reader.shutdown(wait=True, cancel_futures=True)
+            writer.shutdown(wait=True)
+            batches.close()
+            self._log_memo_stats(*self._memo_stats())
+
+        self._save_watermark()
+        return self.STATUS_FINISHED
+
+    def _saved(self, saving: Future) -> bool:
+        """Waits for a background save, logging its error the way run does."""
+        try:
+            saving.result()
+            return True
+        except Exception as e:
+            self.log.error(f"Failed to save dataframe.\n{e}")
+            return False
+
+    def _run_pooled(self, batch_size: int, only_missing: bool, total: int):
+        """
+        Same as run, but batches are parsed in a pool of worker processes.
+
+        This process stays the only reader and writer: it keeps at most
+        IN_FLIGHT_PER_WORKER batches per worker queued and saves them in the order they
+        were read, so memory stays bounded and commits are ordered.
+        """
+        max_in_flight = self.workers * self.IN_FLIGHT_PER_WORKER
+        in_flight = deque()
+        exhausted = False
+        worker_memo_stats = {}
+
+        batches = self._iter_text_to_parse(batch_size, only_missing)
+        pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(self.__class__, self._worker_options()),
+        )
+        try:
+            while True:
+                while not exhausted and len(in_flight) < max_in_flight:
+                    df = next(batches, None)
+                    if df is None:
+                        exhausted = True
+                        break
+
+                    in_flight.append((df, pool.submit(_parse_in_worker, df)))
+
+                if not in_flight:
+                    break
+
+                df, future = in_flight.popleft()
+                df_parsed, pid, worker_memo_stats[pid], steps, aliases = future.result()
+                self.timer.merge(steps)
+
+                self.validate_parsing(df, df_parsed)
+
+                try:
+                    self._save(df_parsed, len(df), aliases)
+                    yield self.STATUS_PROCESSING
+                except Exception as e:
+                    self.log.error(f"Failed to save dataframe.\n{e}")
+                    return self.STATUS_ERROR
+        finally:
+            batches.close()
+            pool.shutdown(wait=True, cancel_futures=True)
+            self._log_memo_stats(
+                sum(hits for hits, _ in worker_memo_stats.values()),
+                sum(misses for _, misses in worker_memo_stats.values()),
+            )
+
+        self._save_watermark()
         return self.STATUS_FINISHED
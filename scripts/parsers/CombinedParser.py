@@ -0,0 +1,119 @@
+from typing import Optional
+
+import pandas as pd
+from sqlalchemy import Select, exists, select
+
+from scripts.parsers.AbstractParser import AbstractParser
+from scripts.parsers.DetailsParser import DetailsParser
+from scripts.parsers.PriceParser import PriceParser
+from scripts.parsers.SummaryParser import SummaryParser
+from scripts.shared.Models import Car, Details, Price, RawListing
+from scripts.utils.DbUtil import postgres_upsert_many
+
+
+class CombinedParser(AbstractParser):
+    """
+    Runs SummaryParser, DetailsParser and PriceParser over a single scan of raw_listing.
+
+    Every batch reads raw_summary, raw_details and raw_price together and the three parsed
+    frames are upserted into car, details and price in one transaction. A row is read when
+    any of its sections changed, and only the sections whose hash differs from the raw_hash
+    stored in their own table are parsed and upserted.
+    """
+
+    PARSERS = (
+        (SummaryParser, RawListing.raw_summary, RawListing.summary_hash, Car),
+        (DetailsParser, RawListing.raw_details, RawListing.details_hash, Details),
+        (PriceParser, RawListing.raw_price, RawListing.price_hash, Price),
+    )
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.parsers = [
+            (parser_cls(**self._worker_options()), raw_column, raw_hash, table)
+            for parser_cls, raw_column, raw_hash, table in self.PARSERS
+        ]
+        for parser, _, _, _ in self.parsers:
+            parser.timer = self.timer
+
+    def _tables(self) -> list:
+        return [table for _, _, _, table in self.PARSERS]
+
+    def _raw_hashes(self) -> list:
+        return [raw_hash for _, _, raw_hash, _ in self.PARSERS]
+
+    def _get_text_query(
+        self, batch_size: Optional[int], after_id: Optional[int], only_missing: bool
+    ) -> Select:
+        columns = [raw_column for _, raw_column, _, _ in self.PARSERS] + self._raw_hashes()
+        if self.source is None and not self.reparse:
+            columns += self._unchanged_columns()
+
+        return self._select_raw_text(
+            columns,
+            self._tables(),
+            batch_size,
+            after_id,
+            only_missing,
+        )
+
+    def _unchanged_columns(self) -> list:
+        """Per table, whether the row is stored there with the current hash of its section."""
+        return [
+            exists(
+                select(1).where(
+                    table.id == RawListing.id, table.raw_hash.is_not_distinct_from(raw_hash)
+                )
+            ).label(self._unchanged_name(table))
+            for _, _, raw_hash, table in self.PARSERS
+        ]
+
+    @staticmethod
+    def _unchanged_name(table) -> str:
+        return f"{table.__tablename__}_unchanged"
+
+    def _changed_rows(self, df: pd.DataFrame, table) -> pd.DataFrame:
+        """Rows of df whose section of table is parsed, all of them without hash columns."""
+        unchanged = self._unchanged_name(table)
+        if unchanged not in df.columns:
+            return df
+
+        return df[~df[unchanged].astype(bool)]
+
+    def _save_parsed_text_df(self, df_parsed: list[tuple]):
+        postgres_upsert_many(conn=self.session, frames=df_parsed, update_time=True)
+
+    def _parsed_frames(self, df_parsed: list[tuple]) -> list[tuple]:
+        return df_parsed
+
+    def _parse(self, df: pd.DataFrame) -> list[tuple]:
+        parsed = []
+        for parser, raw_column, raw_hash, table in self.parsers:
+            df_section = self._changed_rows(df, table)[
+                [RawListing.id.name, raw_column.name, raw_hash.name]
+            ].rename(columns={raw_hash.name: table.raw_hash.name})
+            if df_section.empty:
+                continue
+
+            parsed.append((table, parser._parse(df_section)))
+
+        return parsed
+
+    def _memo_stats(self) -> tuple[int, int]:
+        stats = [parser._memo_stats() for parser, _, _, _ in self.parsers]
+        return sum(hits for hits, _ in stats), sum(misses for _, misses in stats)
+
+    def _take_new_aliases(self) -> dict:
+        aliases = {}
+        for parser, _, _, _ in self.parsers:
+            aliases.update(parser._take_new_aliases())
+        return aliases
+
+    def _save_aliases(self, aliases: dict):
+        for parser, _, _, _ in self.parsers:
+            parser._save_aliases(aliases)
+
+    def validate_parsing(self, original_df: pd.DataFrame, parsed_df: list[tuple]):
+        """Checks every section against the rows that were parsed for it."""
+        for table, df_section in parsed_df:
+            super().validate_parsing(self._changed_rows(original_df, table), df_section)
@@ -0,0 +1,58 @@
+import datetime
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from scripts.shared.Models import Base
+from scripts.utils.ArrowUtil import arrow_schema
+from scripts.utils.DbUtil import timezone
+
+
+class ParquetSink:
+    """
+    Writes parsed frames to Parquet instead of upserting them, one file per table
+    (<directory>/<table name>.parquet) holding every batch of the run as row groups.
+    The files can be bulk loaded into postgres afterwards.
+
+    Column types come from the table's model, so batches where a column happens to be
+    all empty still share one schema. Files are complete once close() was called.
+
+    Example:
+        sink = ParquetSink("exports/parsed")
+        sink.save(Price, df_parsed, update_time=True)
+        sink.close()
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.writers: dict[str, pq.ParquetWriter] = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, table: Base) -> str:
+        return os.path.join(self.directory, f"{table.__tablename__}.parquet")
+
+    def save(self, table: Base, df: pd.DataFrame, update_time: bool):
+        """Appends df to the table's file, stamping updated_at the way postgres_upsert does."""
+        df = df.copy()
+        if update_time:
+            df["updated_at"] = datetime.datetime.now(timezone)
+
+        schema = self._schema(table, df)
+        arrow_table = pa.Table.from_pandas(df[schema.names], schema=schema, preserve_index=False)
+
+        name = table.__tablename__
+        if name not in self.writers:
+            self.writers[name] = pq.ParquetWriter(self.path(table), schema)
+
+        self.writers[name].write_table(arrow_table)
+
+    def close(self):
+        for writer in self.writers.values():
+            writer.close()
+        self.writers = {}
+
+    def _schema(self, table: Base, df: pd.DataFrame) -> pa.Schema:
+        """Table columns present in df, in table order, typed after the model."""
+        return arrow_schema(c for c in table.__table__.columns if c.name in df.columns)
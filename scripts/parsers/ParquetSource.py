@@ -0,0 +1,83 @@
+from typing import Iterator
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+from scripts.shared.Models import RawListing
+from scripts.utils.HashUtil import section_hash
+
+
+class ParquetSource:
+    """
+    Reads raw_listing rows from Parquet or Arrow IPC files instead of the database, so
+    parsers can run on a machine without access to it.
+
+    path is a single file or a directory of files. Files ending in .arrow, .feather or
+    .ipc are read as Arrow IPC, anything else as Parquet. Columns are named as in
+    raw_listing; hash columns missing from the files are computed the way postgres
+    generates them.
+
+    Example:
+        source = ParquetSource("exports/raw_listing.parquet")
+        for df in source.batches({"id": "id", "raw_price": "raw_price"}, batch_size=1000):
+            ...
+    """
+
+    IPC_SUFFIXES = (".arrow", ".feather", ".ipc")
+
+    HASHED_SECTIONS = {
+        RawListing.summary_hash.name: RawListing.raw_summary.name,
+        RawListing.details_hash.name: RawListing.raw_details.name,
+        RawListing.price_hash.name: RawListing.raw_price.name,
+    }
+
+    def __init__(self, path: str):
+        self.path = path
+        file_format = "ipc" if path.lower().endswith(self.IPC_SUFFIXES) else "parquet"
+        self.dataset = ds.dataset(path, format=file_format)
+
+    def count(self) -> int:
+        return self.dataset.count_rows()
+
+    def batches(self, columns: dict[str, str], batch_size: int) -> Iterator[pd.DataFrame]:
+        """
+        Yields frames of at most batch_size rows, in file order.
+
+        Args:
+            columns (dict): frame column name -> raw_listing column it is read from
+            batch_size (int): maximum rows per frame
+        """
+        available = set(self.dataset.schema.names)
+        computed = {
+            source: self.HASHED_SECTIONS[source]
+            for source in columns.values()
+            if source not in available and source in self.HASHED_SECTIONS
+        }
+        read = [source for source in columns.values() if source not in computed]
+        read = list(dict.fromkeys(read + list(computed.values())))
+
+        pending, rows = [], 0
+        for batch in self.dataset.to_batches(columns=read, batch_size=batch_size):
+            pending.append(batch)
+            rows += batch.num_rows
+
+            # Row groups rarely line up with batch_size, full batches are cut from them
+            while rows >= batch_size:
+                table = pa.Table.from_batches(pending)
+                yield self._frame(table.slice(0, batch_size), columns, computed)
+
+                rest = table.slice(batch_size)
+                pending, rows = rest.to_batches(), rest.num_rows
+
+        if rows:
+            yield self._frame(pa.Table.from_batches(pending), columns, computed)
+
+    def _frame(self, table: pa.Table, columns: dict[str, str], computed: dict) -> pd.DataFrame:
+        df = table.to_pandas()
+        for hash_column, raw_column in computed.items():
+            df[hash_column] = [
+                None if pd.isna(text) else section_hash(text) for text in df[raw_column]
+            ]
+
+        return pd.DataFrame({name: df[source] for name, source in columns.items()})
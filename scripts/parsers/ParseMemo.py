@@ -0,0 +1,49 @@
+from collections import OrderedDict
+
+MISSING = object()
+
+
+class ParseMemo:
+    """
+    Bounded LRU cache of parse results keyed on the raw text they were parsed from.
+
+    Values are the parsed columns of one row, kept as a tuple. Once maxsize entries are
+    stored, the least recently used one is dropped for every new entry.
+
+    Example:
+        >>> memo = ParseMemo(maxsize=2)
+        >>> memo.put("199 EUR Cena Netto", (199, "EUR", "Cena Netto"))
+        >>> memo.get("199 EUR Cena Netto")
+        (199, 'EUR', 'Cena Netto')
+        >>> memo.hits, memo.misses
+        (1, 0)
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        # Columns of the extraction the values came from, in its order, set by the first one
+        self.columns = None
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, key):
+        """Returns the cached value, or MISSING. Every call counts as a hit or a miss."""
+        value = self.entries.get(key, MISSING)
+        if value is MISSING:
+            self.misses += 1
+            return MISSING
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
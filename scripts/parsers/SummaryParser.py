@@ -1,51 +1,53 @@
 import re
+from typing import Optional
 
 import pandas as pd
-from sqlalchemy import exists, func, not_, select
+from sqlalchemy import Select
 
 from scripts.parsers.AbstractParser import AbstractParser
 from scripts.shared.Models import Car, RawListing
-from scripts.utils.DbUtil import DbConnector as db
 from scripts.utils.DbUtil import postgres_upsert
 from scripts.normalizers.StringNormalizer import StringNormalizer
 
 class SummaryParser(AbstractParser):
     MULTI_WORD_MAKES = {"Land Rover", "Alfa Romeo", "Aston Martin", "Rolls Royce"}
 
-    def __init__(self):
-        super().__init__()
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
         self.multi_word_re = "|".join([re.escape(m) for m in self.MULTI_WORD_MAKES])
         self.s_normal = StringNormalizer()
 
-    def get_total_records(self, only_missing):
-        if only_missing:
-            query = select(func.count(RawListing.id)).where(
-                not_(exists(select(1).where(Car.id == RawListing.id)))
-            )
-        else:
-            query = select(func.count(RawListing.id))
-        result = db().get_session().execute(query).scalar()
-        return int(result)
-
-    def _get_text_to_parse_as_df(
-        self, batch_size: int, offset: int, only_missing: bool
-    ) -> pd.DataFrame:
-        if only_missing:
-            query = (
-                select(RawListing.id, RawListing.raw_summary)
-                .where(not_(exists(select(1).where(Car.id == RawListing.id))))
-                .limit(batch_size)
-            )
-        else:
-            query = select(RawListing.id, RawListing.raw_summary).limit(batch_size).offset(offset)
+    def _tables(self) -> list:
+        return [Car]
+
+    def _raw_hashes(self) -> list:
+        return [RawListing.summary_hash]
 
-        return pd.read_sql_query(sql=query, con=self.engine)
+    def _raw_column(self):
+        return RawListing.raw_summary
+
+    def _get_text_query(
+        self, batch_size: Optional[int], after_id: Optional[int], only_missing: bool
+    ) -> Select:
+        return self._select_raw_text(
+            [RawListing.raw_summary, RawListing.summary_hash.label(Car.raw_hash.name)],
+            self._tables(),
+            batch_size,
+            after_id,
+            only_missing,
+        )
 
     def _save_parsed_text_df(self, df_parsed: pd.DataFrame):
         postgres_upsert(table=Car, conn=self.session, df=df_parsed, update_time=True)
 
-    def _extract_model_and_shrink(self, row: pd.Series, col_from: str, col_to: str):
-        working = row[col_from].strip()
+    def _take_new_aliases(self) -> dict:
+        return self.s_normal.take_unsaved_aliases()
+
+    def _save_aliases(self, aliases: dict):
+        self.s_normal.save_aliases(aliases)
+
+    def _split_model(self, working: str) -> tuple:
+        working = working.strip()
         working = re.sub(r"^[•.]+\s*", "", working)
 
         toks = working.split()
@@ -57,7 +59,29 @@ class SummaryParser(AbstractParser):
 
         updated_working = self._remove_words_from_string(working, model)
 
-        return pd.Series([model.strip(self.STRIP_EXP), updated_working], index=[col_to, col_from])
+        return model.strip(self.STRIP_EXP), updated_working
+
+    def _split_variant(self, working) -> tuple:
+        working_text = str(working).strip() if working is not None else ""
+
+        if not working_text:
+            return None, None
+
+        if "•" in working_text:
+            variant_part = working_text.split("•")[0].strip()
+            remaining = "•".join(working_text.split("•")[1:]).strip()
+
+            remaining = self._remove_words_from_string(remaining, variant_part)
+            remaining = re.sub(r"^\s*•\s*", "", remaining).strip()
+
+            return variant_part.strip(self.STRIP_EXP), remaining
+
+        return None, working_text
+
+    def _extract_model_and_shrink(self, row: pd.Series, col_from: str, col_to: str):
+        model, updated_working = self._split_model(row[col_from])
+
+        return pd.Series([model, updated_working], index=[col_to, col_from])
 
     def _extract_variant(self, row: pd.Series, col_from: str, col_to: str):
         """
@@ -67,55 +91,64 @@ class SummaryParser(AbstractParser):
             Output: col_to='1.2 TCe Limited EDC',
                     col_from='120 KM • Renault Clio'
         """
-        working_text = str(row[col_from]).strip() if row[col_from] is not None else ""
+        variant, remaining = self._split_variant(row[col_from])
 
-        if not working_text:
-            return pd.Series([None, None], index=[col_to, col_from])
+        return pd.Series([variant, remaining], index=[col_to, col_from])
 
-        if "•" in working_text:
-            variant_part = working_text.split("•")[0].strip()
-            remaining = "•".join(working_text.split("•")[1:]).strip()
+    def _extract_model_column(self, df: pd.DataFrame, col_from: str, col_to: str):
+        with self._step(f"parse: {col_to}", len(df)):
+            if not self.vectorized:
+                df[[col_to, col_from]] = df.apply(
+                    self._extract_model_and_shrink, args=(col_from, col_to), axis=1
+                )
+                return
 
-            remaining = self._remove_words_from_string(remaining, variant_part)
-            remaining = re.sub(r"^\s*•\s*", "", remaining).strip()
-
-            return pd.Series(
-                [variant_part.strip(self.STRIP_EXP), remaining], index=[col_to, col_from]
+            split = [self._split_model(value) for value in df[col_from]]
+            self._assign_split_column(
+                df, col_from, col_to, [s[0] for s in split], [s[1] for s in split]
             )
 
-        return pd.Series([None, working_text], index=[col_to, col_from])
+    def _extract_variant_column(self, df: pd.DataFrame, col_from: str, col_to: str):
+        with self._step(f"parse: {col_to}", len(df)):
+            if not self.vectorized:
+                df[[col_to, col_from]] = df.apply(
+                    self._extract_variant, args=(col_from, col_to), axis=1
+                )
+                return
+
+            split = [self._split_variant(value) for value in df[col_from]]
+            self._assign_split_column(
+                df, col_from, col_to, [s[0] for s in split], [s[1] for s in split]
+            )
 
-    def _parse(self, df: pd.DataFrame) -> pd.DataFrame:
+    def _extract(self, df: pd.DataFrame) -> pd.DataFrame:
         from_col = RawListing.raw_summary.name
 
-        df[[Car.engine_cc.name, from_col]] = df.apply(
-            self._extract_pattern,
-            args=(from_col, Car.engine_cc.name, r"(\d+)\s?cm3", float),
-            axis=1,
-        )
+        self._extract_pattern_column(df, from_col, Car.engine_cc.name, r"(\d+)\s?cm3", float)
 
-        df[[Car.power_hp.name, from_col]] = df.apply(
-            self._extract_pattern,
-            args=(from_col, Car.power_hp.name, r"(\d+)\s?KM", float),
-            axis=1,
-        )
+        self._extract_pattern_column(df, from_col, Car.power_hp.name, r"(\d+)\s?KM", float)
 
-        df[[Car.make.name, from_col]] = df.apply(
-            self._extract_pattern,
-            args=(from_col, Car.make.name, rf"({self.multi_word_re}|\S+)", None),
-            axis=1,
+        self._extract_pattern_column(
+            df, from_col, Car.make.name, rf"({self.multi_word_re}|\S+)", None
         )
-        df[Car.make.name] = self.s_normal.normalize_column_words(df[Car.make.name], Car, Car.make.name)
 
-        df[[Car.model.name, from_col]] = df.apply(
-            self._extract_model_and_shrink, args=(from_col, Car.model.name), axis=1
-        )
-        df[Car.model.name] = self.s_normal.normalize_column_words(df[Car.model.name], Car, Car.model.name)
+        self._extract_model_column(df, from_col, Car.model.name)
 
-        df[[Car.variant.name, from_col]] = df.apply(
-            self._extract_variant, args=(from_col, Car.variant.name), axis=1
-        )
+        self._extract_variant_column(df, from_col, Car.variant.name)
 
         df.rename(columns={from_col: Car.description.name}, inplace=True)
 
         return df
+
+    def _normalize(self, df: pd.DataFrame) -> pd.DataFrame:
+        with self._step(f"normalize: {Car.make.name}", len(df)):
+            df[Car.make.name] = self.s_normal.normalize_column_words(
+                df[Car.make.name], Car, Car.make.name
+            )
+
+        with self._step(f"normalize: {Car.model.name}", len(df)):
+            df[Car.model.name] = self.s_normal.normalize_column_words(
+                df[Car.model.name], Car, Car.model.name
+            )
+
+        return df
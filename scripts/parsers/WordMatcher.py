@@ -0,0 +1,119 @@
+import re
+from functools import lru_cache
+from typing import Optional
+
+REGEX_FLAGS = re.IGNORECASE | re.UNICODE
+
+# A word without any of these characters means the same thing as a regex and as a literal.
+REGEX_META_RE = re.compile(r"[.^$*+?{}\[\]\\|()]")
+# Characters for which re.IGNORECASE and str.lower() disagree (İ, ı, ſ and everything past Latin).
+CASE_FOLD_UNSAFE_RE = re.compile("[\u0130\u0131\u017f\u0370-\U0010ffff]")
+
+
+def split_words(words: str) -> tuple[str, ...]:
+    """Splits on special characters except dots, then on whitespace."""
+    parts = re.split(r"[^a-zA-Z0-9.\s]+", words)
+    return tuple(w for part in parts for w in part.split())
+
+
+def _is_prefix_free(words: list[str]) -> bool:
+    ordered = sorted(set(words))
+    return all(not b.startswith(a) for a, b in zip(ordered, ordered[1:], strict=False))
+
+
+def _trie_pattern(words: list[str]) -> str:
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+
+    return _node_pattern(trie)
+
+
+def _node_pattern(node: dict) -> str:
+    if all(not child for child in node.values()) and len(node) > 1:
+        return "[" + "".join(re.escape(char) for char in sorted(node)) + "]"
+
+    branches = [re.escape(char) + _node_pattern(child) for char, child in sorted(node.items())]
+    if len(branches) == 1:
+        return branches[0]
+
+    return r"(?:" + "|".join(branches) + r")"
+
+
+class WordMatcher:
+    """
+    Compiled removal pattern for one list of words.
+
+    Matches the same text as the parsers' alternation of every escaped word followed by
+    every raw word, case-insensitively. When all of them are plain text and none is a
+    prefix of another, the words are merged into a trie-shaped regex, so matching cost
+    does not grow with the length of the list.
+
+    Example:
+        >>> WordMatcher.for_words(["ad link", "2019", "2020"]).sub("ad link 45 900 PLN 2020")
+        ' 45 900 PLN '
+    """
+
+    def __init__(self, words: tuple[str, ...], keep_blank: bool = True):
+        """
+        Args:
+            words (tuple): Words to remove, raw words are used as regexes as well
+            keep_blank (bool): Whether whitespace-only words still add an (empty) escaped
+                alternative, as in _remove_words_from_string
+        """
+        self.words = words
+
+        if keep_blank:
+            kept = [w for w in words if w and isinstance(w, str)]
+        else:
+            kept = [w for w in words if isinstance(w, str) and w.strip()]
+
+        self.regex: Optional[re.Pattern] = None
+        self.is_trie = False
+
+        if not kept:
+            return
+
+        literals = [w.strip() for w in kept] + list(words)
+        if self._can_use_trie(literals):
+            self.regex = re.compile(_trie_pattern([w.lower() for w in literals]), REGEX_FLAGS)
+            self.is_trie = True
+            return
+
+        escaped = [re.escape(w.strip()) for w in kept]
+        self.regex = re.compile(r"(?:" + "|".join(escaped + list(words)) + r")", REGEX_FLAGS)
+
+    @staticmethod
+    def _can_use_trie(literals: list) -> bool:
+        if not all(isinstance(w, str) and w for w in literals):
+            return False
+
+        if any(REGEX_META_RE.search(w) or CASE_FOLD_UNSAFE_RE.search(w) for w in literals):
+            return False
+
+        return _is_prefix_free([w.lower() for w in literals])
+
+    @classmethod
+    def for_words(
+        cls, words_to_remove: str | list[str] | tuple[str, ...], keep_blank: bool = True
+    ) -> "WordMatcher":
+        """Returns the cached matcher for a word list, a string is split into words first."""
+        if isinstance(words_to_remove, str):
+            words = split_words(words_to_remove)
+        else:
+            words = tuple(words_to_remove)
+
+        return _cached_matcher(cls, words, keep_blank)
+
+    def sub(self, text: str, repl: str = "") -> str:
+        if self.regex is None:
+            return text
+
+        return self.regex.sub(repl, text)
+
+
+@lru_cache(maxsize=8192)
+def _cached_matcher(cls: type, words: tuple[str, ...], keep_blank: bool) -> WordMatcher:
+    return cls(words, keep_blank)
@@ -1,6 +1,6 @@
 from typing import List, Optional
 
-from sqlalchemy import BigInteger, Boolean, DateTime, Double, Enum, ForeignKeyConstraint, Index, Integer, Numeric, PrimaryKeyConstraint, REAL, Sequence, SmallInteger, String, Text, UniqueConstraint, text
+from sqlalchemy import BigInteger, Boolean, CHAR, Computed, DateTime, Double, Enum, ForeignKeyConstraint, Index, Integer, Numeric, PrimaryKeyConstraint, REAL, Sequence, SmallInteger, String, Text, UniqueConstraint, text
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 import datetime
 import decimal
@@ -22,6 +22,7 @@ class Car(Base):
     engine_cc: Mapped[Optional[decimal.Decimal]] = mapped_column(Numeric)
     power_hp: Mapped[Optional[decimal.Decimal]] = mapped_column(Numeric)
     description: Mapped[Optional[str]] = mapped_column(Text)
+    raw_hash: Mapped[Optional[str]] = mapped_column(CHAR(32))
     created_at: Mapped[Optional[datetime.datetime]] = mapped_column(DateTime(True), server_default=text('CURRENT_TIMESTAMP'))
     updated_at: Mapped[Optional[datetime.datetime]] = mapped_column(DateTime(True), server_default=text('CURRENT_TIMESTAMP'))
 
@@ -45,6 +46,7 @@ class CarP0(Base):
     engine_cc: Mapped[Optional[decimal.Decimal]] = mapped_column(Numeric)
     power_hp: Mapped[Optional[decimal.Decimal]] = mapped_column(Numeric)
     description: Mapped[Optional[str]] = mapped_column(Text)
+    raw_hash: Mapped[Optional[str]] = mapped_column(CHAR(32))
     created_at: Mapped[Optional[datetime.datetime]] = mapped_column(DateTime(True), server_default=text('CURRENT_TIMESTAMP'))
     updated_at: Mapped[Optional[datetime.datetime]] = mapped_column(DateTime(True), server_default=text('CURRENT_TIMESTAMP'))
 
@@ -68,6 +70,7 @@ class CarP1(Base):
     engine_cc: Mapped[Optional[decimal.Decimal]] = mapped_column(Numeric)
     power_hp: Mapped[Optional[decimal.Decimal]] = mapped_column(Numeric)
     description: Mapped[Optional[str]] = mapped_column(Text)
+    raw_hash: Mapped[Optional[str]] = mapped_column(CHAR(32))
     created_at: Mapped[Optional[datetime.datetime]] = mapped_column(DateTime(True), server_default=text('CURRENT_TIMESTAMP'))
     updated_at: Mapped[Optional[datetime.datetime]] = mapped_column(DateTime(True), server_default=text('CURRENT_TIMESTAMP'))
 
@@ -91,6 +94,7 @@ class CarP2(Base):
     engine_cc: Mapped[Optional[decimal.Decimal]] = mapped_column(Numeric)
     power_hp: Mapped[Optional[decimal.Decimal]] = mapped_column(Numeric)
     description: Mapped[Optional[str]] = mapped_column(Text)
+    raw_hash: Mapped[Optional[str]] = mapped_column(CHAR(32))
     created_at: Mapped[Optional[datetime.datetime]] = mapped_column(DateTime(True), server_default=text('CURRENT_TIMESTAMP'))
     updated_at: Mapped[Optional[datetime.datetime]] = mapped_column(DateTime(True), server_default=text('CURRENT_TIMESTAMP'))
 
@@ -114,6 +118,33 @@ class CarP3(Base):
     engine_cc: Mapped[Optional[decimal.Decimal]] = mapped_column(Numeric)
     power_hp: Mapped[Optional[decimal.Decimal]] = mapped_column(Numeric)
     description: Mapped[Optional[str]] = mapped_column(Text)
+    raw_hash: Mapped[Optional[str]] = mapped_column(CHAR(32))
+    created_at: Mapped[Optional[datetime.datetime]] = mapped_column(DateTime(True), server_default=text('CURRENT_TIMESTAMP'))
+    updated_at: Mapped[Optional[datetime.datetime]] = mapped_column(DateTime(True), server_default=text('CURRENT_TIMESTAMP'))
+
+
+class NormalizationAlias(Base):
+    __tablename__ = 'normalization_alias'
+    __table_args__ = (
+        PrimaryKeyConstraint('table_name', 'column_name', 'raw_value', name='normalization_alias_pkey'),
+    )
+
+    table_name: Mapped[str] = mapped_column(String(100), primary_key=True)
+    column_name: Mapped[str] = mapped_column(String(100), primary_key=True)
+    raw_value: Mapped[str] = mapped_column(Text, primary_key=True)
+    canonical_value: Mapped[str] = mapped_column(Text)
+    created_at: Mapped[Optional[datetime.datetime]] = mapped_column(DateTime(True), server_default=text('CURRENT_TIMESTAMP'))
+    updated_at: Mapped[Optional[datetime.datetime]] = mapped_column(DateTime(True), server_default=text('CURRENT_TIMESTAMP'))
+
+
+class ParserWatermark(Base):
+    __tablename__ = 'parser_watermark'
+    __table_args__ = (
+        PrimaryKeyConstraint('parser_name', name='parser_watermark_pkey'),
+    )
+
+    parser_name: Mapped[str] = mapped_column(String(100), primary_key=True)
+    watermark: Mapped[datetime.datetime] = mapped_column(DateTime(True))
     created_at: Mapped[Optional[datetime.datetime]] = mapped_column(DateTime(True), server_default=text('CURRENT_TIMESTAMP'))
     updated_at: Mapped[Optional[datetime.datetime]] = mapped_column(DateTime(True), server_default=text('CURRENT_TIMESTAMP'))
 
@@ -144,7 +175,9 @@ class RawListing(Base):
         Index('idx_raw_listing_created_at', 'created_at'),
         Index('idx_raw_listing_details_like', 'raw_details'),
         Index('idx_raw_listing_price_like', 'raw_price'),
-        Index('idx_raw_listing_summary_like', 'raw_summary')
+        Index('idx_raw_listing_summary_like', 'raw_summary'),
+        Index('idx_raw_listing_updated_at', 'updated_at'),
+        Index('idx_raw_listing_status_lease', 'status', 'lease_expires_at')
     )
 
     id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
@@ -153,6 +186,11 @@ class RawListing(Base):
     raw_details: Mapped[Optional[str]] = mapped_column(Text)
     raw_price: Mapped[Optional[str]] = mapped_column(Text)
     status: Mapped[Optional[str]] = mapped_column(String(50))
+    lease_owner: Mapped[Optional[str]] = mapped_column(Text)
+    lease_expires_at: Mapped[Optional[datetime.datetime]] = mapped_column(DateTime(True))
+    summary_hash: Mapped[Optional[str]] = mapped_column(CHAR(32), Computed('md5(raw_summary)', persisted=True))
+    details_hash: Mapped[Optional[str]] = mapped_column(CHAR(32), Computed('md5(raw_details)', persisted=True))
+    price_hash: Mapped[Optional[str]] = mapped_column(CHAR(32), Computed('md5(raw_price)', persisted=True))
     created_at: Mapped[Optional[datetime.datetime]] = mapped_column(DateTime(True), server_default=text('CURRENT_TIMESTAMP'))
     updated_at: Mapped[Optional[datetime.datetime]] = mapped_column(DateTime(True), server_default=text('CURRENT_TIMESTAMP'))
 
@@ -203,6 +241,7 @@ class Details(Base):
     is_featured: Mapped[Optional[bool]] = mapped_column(Boolean)
     is_verified: Mapped[Optional[bool]] = mapped_column(Boolean)
     is_stamped: Mapped[Optional[bool]] = mapped_column(Boolean)
+    raw_hash: Mapped[Optional[str]] = mapped_column(CHAR(32))
     created_at: Mapped[Optional[datetime.datetime]] = mapped_column(DateTime(True), server_default=text('CURRENT_TIMESTAMP'))
     updated_at: Mapped[Optional[datetime.datetime]] = mapped_column(DateTime(True), server_default=text('CURRENT_TIMESTAMP'))
 
@@ -229,6 +268,7 @@ class DetailsYear20002010(Base):
     is_featured: Mapped[Optional[bool]] = mapped_column(Boolean)
     is_verified: Mapped[Optional[bool]] = mapped_column(Boolean)
     is_stamped: Mapped[Optional[bool]] = mapped_column(Boolean)
+    raw_hash: Mapped[Optional[str]] = mapped_column(CHAR(32))
     created_at: Mapped[Optional[datetime.datetime]] = mapped_column(DateTime(True), server_default=text('CURRENT_TIMESTAMP'))
     updated_at: Mapped[Optional[datetime.datetime]] = mapped_column(DateTime(True), server_default=text('CURRENT_TIMESTAMP'))
 
@@ -255,6 +295,7 @@ class DetailsYear20102020(Base):
     is_featured: Mapped[Optional[bool]] = mapped_column(Boolean)
     is_verified: Mapped[Optional[bool]] = mapped_column(Boolean)
     is_stamped: Mapped[Optional[bool]] = mapped_column(Boolean)
+    raw_hash: Mapped[Optional[str]] = mapped_column(CHAR(32))
     created_at: Mapped[Optional[datetime.datetime]] = mapped_column(DateTime(True), server_default=text('CURRENT_TIMESTAMP'))
     updated_at: Mapped[Optional[datetime.datetime]] = mapped_column(DateTime(True), server_default=text('CURRENT_TIMESTAMP'))
 
@@ -281,6 +322,7 @@ class DetailsYear20202030(Base):
     is_featured: Mapped[Optional[bool]] = mapped_column(Boolean)
     is_verified: Mapped[Optional[bool]] = mapped_column(Boolean)
     is_stamped: Mapped[Optional[bool]] = mapped_column(Boolean)
+    raw_hash: Mapped[Optional[str]] = mapped_column(CHAR(32))
     created_at: Mapped[Optional[datetime.datetime]] = mapped_column(DateTime(True), server_default=text('CURRENT_TIMESTAMP'))
     updated_at: Mapped[Optional[datetime.datetime]] = mapped_column(DateTime(True), server_default=text('CURRENT_TIMESTAMP'))
 
@@ -307,6 +349,7 @@ class DetailsYearGte2030(Base):
     is_featured: Mapped[Optional[bool]] = mapped_column(Boolean)
     is_verified: Mapped[Optional[bool]] = mapped_column(Boolean)
     is_stamped: Mapped[Optional[bool]] = mapped_column(Boolean)
+    raw_hash: Mapped[Optional[str]] = mapped_column(CHAR(32))
     created_at: Mapped[Optional[datetime.datetime]] = mapped_column(DateTime(True), server_default=text('CURRENT_TIMESTAMP'))
     updated_at: Mapped[Optional[datetime.datetime]] = mapped_column(DateTime(True), server_default=text('CURRENT_TIMESTAMP'))
 
@@ -333,6 +376,7 @@ class DetailsYearLt2000(Base):
     is_featured: Mapped[Optional[bool]] = mapped_column(Boolean)
     is_verified: Mapped[Optional[bool]] = mapped_column(Boolean)
     is_stamped: Mapped[Optional[bool]] = mapped_column(Boolean)
+    raw_hash: Mapped[Optional[str]] = mapped_column(CHAR(32))
     created_at: Mapped[Optional[datetime.datetime]] = mapped_column(DateTime(True), server_default=text('CURRENT_TIMESTAMP'))
     updated_at: Mapped[Optional[datetime.datetime]] = mapped_column(DateTime(True), server_default=text('CURRENT_TIMESTAMP'))
 
@@ -369,6 +413,7 @@ class Price(Base):
     currency: Mapped[str] = mapped_column(String(20), primary_key=True)
     amount: Mapped[Optional[float]] = mapped_column(Double(53))
     segment: Mapped[Optional[str]] = mapped_column(String(100))
+    raw_hash: Mapped[Optional[str]] = mapped_column(CHAR(32))
     created_at: Mapped[Optional[datetime.datetime]] = mapped_column(DateTime(True), server_default=text('CURRENT_TIMESTAMP'))
     updated_at: Mapped[Optional[datetime.datetime]] = mapped_column(DateTime(True), server_default=text('CURRENT_TIMESTAMP'))
 
@@ -387,6 +432,7 @@ class PriceEur(Base):
     currency: Mapped[str] = mapped_column(String(20), primary_key=True)
     amount: Mapped[Optional[float]] = mapped_column(Double(53))
     segment: Mapped[Optional[str]] = mapped_column(String(100))
+    raw_hash: Mapped[Optional[str]] = mapped_column(CHAR(32))
     created_at: Mapped[Optional[datetime.datetime]] = mapped_column(DateTime(True), server_default=text('CURRENT_TIMESTAMP'))
     updated_at: Mapped[Optional[datetime.datetime]] = mapped_column(DateTime(True), server_default=text('CURRENT_TIMESTAMP'))
 
@@ -405,6 +451,7 @@ class PricePln(Base):
     currency: Mapped[str] = mapped_column(String(20), primary_key=True)
     amount: Mapped[Optional[float]] = mapped_column(Double(53))
     segment: Mapped[Optional[str]] = mapped_column(String(100))
+    raw_hash: Mapped[Optional[str]] = mapped_column(CHAR(32))
     created_at: Mapped[Optional[datetime.datetime]] = mapped_column(DateTime(True), server_default=text('CURRENT_TIMESTAMP'))
     updated_at: Mapped[Optional[datetime.datetime]] = mapped_column(DateTime(True), server_default=text('CURRENT_TIMESTAMP'))
 
@@ -0,0 +1,23 @@
+import pyarrow as pa
+from sqlalchemy import BigInteger, Boolean, DateTime, Integer, Numeric
+
+
+def arrow_type(column_type) -> pa.DataType:
+    """Arrow type of a SQLAlchemy column type, text for anything not listed."""
+    if isinstance(column_type, BigInteger):
+        return pa.int64()
+    if isinstance(column_type, Integer):
+        return pa.int32()
+    if isinstance(column_type, Numeric):
+        return pa.float64()
+    if isinstance(column_type, Boolean):
+        return pa.bool_()
+    if isinstance(column_type, DateTime):
+        return pa.timestamp("us", tz="UTC" if column_type.timezone else None)
+
+    return pa.string()
+
+
+def arrow_schema(columns) -> pa.Schema:
+    """Arrow schema of SQLAlchemy columns, e.g. table.__table__.columns or selected_columns."""
+    return pa.schema([pa.field(column.name, arrow_type(column.type)) for column in columns])
@@ -1,8 +1,12 @@
 import datetime
+import io
+import uuid
 from zoneinfo import ZoneInfo
 
 import pandas as pd
-from sqlalchemy import create_engine
+from sqlalchemy import Integer, create_engine, select
+from sqlalchemy import column as sql_column
+from sqlalchemy import table as sql_table
 from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session, sessionmaker
 
@@ -13,54 +17,141 @@ from scripts.utils.LoggerUtil import Logger
 timezone = ZoneInfo(str(env.get_var("TIMEZONE")))
 log = Logger("PGSQL")
 
+# Frames with at least this many rows are upserted through COPY and a staging table.
+COPY_MIN_ROWS = 500
+COPY_NULL = "\\N"
 
-def postgres_upsert(table, conn: Session, df: pd.DataFrame, update_time: bool = False):
-    """
-    Performs PostgreSQL upsert using DataFrame.
-
-    Args:
-        table: SQLAlchemy Table object
-        conn: SQLAlchemy connection
-        df: pandas DataFrame to upsert
-    """
 
+def _execute_upsert(table, conn: Session, df: pd.DataFrame, update_time: bool) -> int:
+    """Runs the upsert of one DataFrame inside the caller's transaction."""
     if update_time:
         df["updated_at"] = datetime.datetime.now(timezone)
 
-    df = df.replace({float("nan"): None})
+    if len(df) >= COPY_MIN_ROWS:
+        affected_rows = _copy_upsert(table, conn, df)
+    else:
+        affected_rows = _values_upsert(table, conn, df)
+
+    if affected_rows == 0:
+        raise ValueError(
+            f"No rows were affected in {table.__tablename__}. Check your data and constraints."
+        )
+
+    if affected_rows != len(df):
+        log.warning(f"Only {affected_rows} rows were affected out of {len(df)} rows in DataFrame")
 
-    data = df.to_dict("records")
+    return affected_rows
 
-    insert_statement = insert(table).values(data)
 
-    upsert_statement = insert_statement.on_conflict_do_update(
+def _on_conflict_update(table, insert_statement):
+    return insert_statement.on_conflict_do_update(
         constraint=f"{table.__tablename__}_pkey",
         set_={c.key: c for c in insert_statement.excluded if c.key not in ("id", "created_at")},
-    ).returning(table.id)
+    )
 
+
+def _values_upsert(table, conn: Session, df: pd.DataFrame) -> int:
+    """Upserts with a single multi-row INSERT ... VALUES, fine for small frames."""
+    data = df.replace({float("nan"): None}).to_dict("records")
+
+    result = conn.execute(_on_conflict_update(table, insert(table).values(data)))
+    return result.rowcount
+
+
+def _copy_upsert(table, conn: Session, df: pd.DataFrame) -> int:
+    """
+    COPYs the DataFrame into a temporary staging table and merges it into the target table
+    with one INSERT ... SELECT ... ON CONFLICT, the row count comes from the command status.
+    The staging table gets a unique name in pg_temp, so it never clashes with another
+    staging table of the transaction or shadows a permanent table, and ON COMMIT DROP
+    removes it.
+    """
+    quote = conn.get_bind().dialect.identifier_preparer.quote
+    staging_name = f"{table.__tablename__}_staging_{uuid.uuid4().hex}"
+    staging_path = f"pg_temp.{quote(staging_name)}"
+    columns = list(df.columns)
+    column_list = ", ".join(quote(c) for c in columns)
+
+    buffer = io.StringIO()
+    _copy_ready(table, df).to_csv(buffer, index=False, header=False, na_rep=COPY_NULL)
+    buffer.seek(0)
+
+    cursor = conn.connection().connection.cursor()
     try:
-        with conn.begin() as transaction:
-            result = conn.execute(upsert_statement)
-            affected_rows = len(result.fetchall())
+        cursor.execute(
+            f"CREATE TEMP TABLE {quote(staging_name)} ON COMMIT DROP AS "
+            f"SELECT {column_list} FROM {quote(table.__tablename__)} WITH NO DATA"
+        )
+        cursor.copy_expert(
+            f"COPY {staging_path} ({column_list}) FROM STDIN "
+            f"WITH (FORMAT csv, NULL '{COPY_NULL}')",
+            buffer,
+        )
+    finally:
+        cursor.close()
+
+    staging = sql_table(staging_name, *(sql_column(c) for c in columns), schema="pg_temp")
+    merge_statement = insert(table).from_select(columns, select(*staging.c))
+
+    result = conn.execute(_on_conflict_update(table, merge_statement))
+    return result.rowcount
+
+
+def _copy_ready(table, df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Integer columns come out of the parsers as floats because of NaNs, COPY would reject
+    their "2019.0" text, so they are written as nullable integers.
+    """
+    df = df.copy()
+    for column in table.__table__.columns:
+        if column.key not in df.columns or not pd.api.types.is_float_dtype(df[column.key]):
+            continue
 
-            if affected_rows == 0:
-                transaction.rollback()
-                raise ValueError(
-                    f"No rows were affected in {table.__tablename__}. Check your data and constraints."
-                )
+        if isinstance(column.type, Integer):
+            df[column.key] = df[column.key].round().astype("Int64")
 
-            if affected_rows != len(df):
-                log.warning(
-                    f"Only {affected_rows} rows were affected out of {len(df)} rows in DataFrame"
-                )
+    return df
 
-            return affected_rows
+
+def postgres_upsert(table, conn: Session, df: pd.DataFrame, update_time: bool = False):
+    """
+    Performs PostgreSQL upsert using DataFrame.
+
+    Args:
+        table: SQLAlchemy Table object
+        conn: SQLAlchemy connection
+        df: pandas DataFrame to upsert
+    """
+    try:
+        with conn.begin():
+            return _execute_upsert(table, conn, df, update_time)
 
     except Exception as e:
         log.error(f"Error during upsert to {table.__tablename__}: {str(e)}")
         raise
 
 
+def postgres_upsert_many(conn: Session, frames: list[tuple], update_time: bool = False) -> int:
+    """
+    Upserts several DataFrames in a single transaction, either all of them are saved or none.
+
+    Args:
+        conn: SQLAlchemy connection
+        frames: list of (SQLAlchemy Table object, pandas DataFrame) pairs
+    """
+    affected_rows = 0
+    try:
+        with conn.begin():
+            for table, df in frames:
+                affected_rows += _execute_upsert(table, conn, df, update_time)
+        return affected_rows
+
+    except Exception as e:
+        tables = ", ".join(table.__tablename__ for table, _ in frames)
+        log.error(f"Error during upsert to {tables}: {str(e)}")
+        raise
+
+
 class DbConnector:
     def __init__(self):
         self.engine = create_engine(pg_url)
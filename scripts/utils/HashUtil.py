@@ -0,0 +1,6 @@
+import hashlib
+
+
+def section_hash(text: str) -> str:
+    """Same digest as the md5() generated *_hash columns of raw_listing."""
+    return hashlib.md5(text.encode("utf-8")).hexdigest()
@@ -0,0 +1,63 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+class StepTimer:
+    """
+    Adds up wall time, calls and rows per named step. Steps can be recorded from several
+    threads, and totals recorded elsewhere (e.g. in a pool worker) can be merged in.
+
+    Example:
+        timer = StepTimer()
+        with timer.step("PriceParser fetch", rows=len(df)):
+            ...
+        for line in timer.summary():
+            log.info(line)
+    """
+
+    def __init__(self):
+        # name -> [calls, rows, seconds]
+        self.steps: dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def step(self, name: str, rows: int = 0):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start, rows)
+
+    def add(self, name: str, seconds: float, rows: int = 0, calls: int = 1):
+        with self._lock:
+            totals = self.steps.setdefault(name, [0, 0, 0.0])
+            totals[0] += calls
+            totals[1] += rows
+            totals[2] += seconds
+
+    def merge(self, steps: dict):
+        """Adds totals taken with pop() from another timer."""
+        for name, (calls, rows, seconds) in steps.items():
+            self.add(name, seconds, rows, calls)
+
+    def pop(self) -> dict:
+        """Returns the totals recorded so far and starts over."""
+        with self._lock:
+            steps, self.steps = self.steps, {}
+        return steps
+
+    def summary(self) -> list[str]:
+        """Formatted table of every step, the slowest first."""
+        with self._lock:
+            steps = sorted(self.steps.items(), key=lambda item: item[1][2], reverse=True)
+
+        width = max((len(name) for name, _ in steps), default=4)
+        lines = [f"{'step':<{width}}  {'calls':>7}  {'rows':>10}  {'seconds':>9}  {'rows/sec':>10}"]
+        for name, (calls, rows, seconds) in steps:
+            rate = f"{rows / seconds:,.0f}" if rows and seconds else "-"
+            lines.append(
+                f"{name:<{width}}  {calls:>7}  {rows:>10}  {seconds:>9.3f}  {rate:>10}"
+            )
+
+        return lines
@@ -0,0 +1,22 @@
+import pytest
+from scrapy.utils.misc import load_object
+
+from scripts.collectors.scraper.scraper import pipelines
+from scripts.collectors.scraper.scraper.spiders.details_spider import DetailsSpider
+from scripts.collectors.scraper.scraper.spiders.listing_spider import ListingSpider
+from scripts.collectors.scraper.scraper.spiders.sharded_listing_spider import (
+    ShardedListingSpider,
+)
+
+
+@pytest.mark.parametrize("spider", [ListingSpider, ShardedListingSpider, DetailsSpider])
+def test_pipelines_load_from_the_module_of_the_signal(spider):
+    # Scrapy imports ITEM_PIPELINES by path, a second copy of the module would send its
+    # own rows_written object, which no spider is connected to
+    for path in spider.custom_settings["ITEM_PIPELINES"]:
+        assert load_object(path).__module__ == pipelines.__name__
+
+
+def test_only_listing_pipeline_confirms_listing_writes():
+    assert pipelines.ListingItemPipeline.WRITES_LISTINGS
+    assert not pipelines.DetailsItemPipeline.WRITES_LISTINGS
@@ -0,0 +1,33 @@
+import random
+
+import pytest
+
+from scripts.benchmarks.benchmarkFuzzyIndex import brute_force_match, known_values, misspell
+from scripts.normalizers.TrigramIndex import TrigramIndex
+
+VALUES = known_values(300, seed=1)
+
+
+@pytest.mark.parametrize("threshold", [0, 0.5, 0.8, 0.95])
+def test_best_match_agrees_with_full_scan(threshold):
+    r = random.Random(3)
+    index = TrigramIndex(VALUES)
+
+    for _ in range(100):
+        text = misspell(r.choice(VALUES), r)
+        assert index.best_match(text, threshold) == brute_force_match(VALUES, text, threshold)
+
+
+@pytest.mark.parametrize("values", [["Golf GTI", "Golf GTD"], ["Golf GTD", "Golf GTI"]])
+def test_tie_goes_to_the_value_added_first(values):
+    index = TrigramIndex(values)
+
+    assert index.best_match("golf gtx", threshold=0) == values[0]
+    assert brute_force_match(values, "golf gtx", threshold=0) == values[0]
+
+
+def test_no_shared_trigram_matches_nothing_at_threshold_0():
+    index = TrigramIndex(["Passat", "Octavia"])
+
+    assert index.best_match("zzz", threshold=0) is None
+    assert brute_force_match(["Passat", "Octavia"], "zzz", threshold=0) is None
@@ -0,0 +1,33 @@
+import pandas as pd
+from pandas.testing import assert_frame_equal
+
+from scripts.parsers.PriceParser import PriceParser
+
+RAW_PRICES = ["ad link 253 530 PLN Cena Brutto", "199 EUR Cena Netto X", "318 000 PLN"]
+
+
+def _batch(ids: list) -> pd.DataFrame:
+    """A PriceParser batch, the id picks the raw text, so batches can repeat texts."""
+    rows = [(id_, RAW_PRICES[id_ % len(RAW_PRICES)], f"hash{id_}") for id_ in ids]
+    return pd.DataFrame(rows, columns=["id", "raw_price", "raw_hash"])
+
+
+def test_memoized_extraction_matches_extract():
+    parser = PriceParser(memo_size=10)
+    df = _batch([1, 2, 3, 4])
+
+    assert_frame_equal(parser._extract_memoized(df), parser._extract(df.copy()))
+
+
+def test_cached_batch_is_built_without_extracting(monkeypatch):
+    parser = PriceParser(memo_size=10)
+    parser._extract_memoized(_batch([1, 2, 3]))
+    df = _batch([5, 6, 4])
+    expected = parser._extract(df.copy())
+
+    def extract(df):
+        raise AssertionError("every row is cached")
+
+    monkeypatch.setattr(parser, "_extract", extract)
+
+    assert_frame_equal(parser._extract_memoized(df), expected)
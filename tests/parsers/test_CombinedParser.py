@@ -0,0 +1,80 @@
+import pandas as pd
+import pytest
+
+from scripts.normalizers.StringNormalizer import StringNormalizer
+from scripts.parsers.CombinedParser import CombinedParser
+from scripts.shared.Models import Car, Details, Price
+
+RAW_ROWS = [
+    (
+        1,
+        "Škoda Golf 3.0d xDrive 1295 cm3 • 134 KM • Škoda Golf 3.0d xDrive Lift",
+        "mileage 300 426 km fuel_type Benzyna+LPG gearbox Automatyczna year 1999"
+        " Nowy Sącz (Lubuskie) Opublikowano 16 dni temu Prywatny sprzedawca",
+        "ad link 253 530 PLN Cena Brutto",
+    ),
+    (
+        2,
+        "Mercedes-Benz Range Rover 1.2 TCe Limited EDC 1604 cm3 • 504 KM •"
+        " Mercedes-Benz Range Rover 1.2 TCe Limited EDC",
+        "mileage 349 620 km fuel_type Benzyna+LPG gearbox Automatyczna year 2003"
+        " Kraków (Lubuskie) Opublikowano 14 dni temu Dealer Zobacz ogłoszenia",
+        "199 EUR Cena Netto X",
+    ),
+    (
+        3,
+        "BMW Seria 3 320d 1995 cm3 • 190 KM • BMW Seria 3 320d M Sport",
+        "mileage 163 769 km fuel_type Diesel gearbox Automatyczna year 2015"
+        " Zielona Góra (Pomorskie) Dealer Zobacz ogłoszenia",
+        "ad link 318 000 PLN Do negocjacji",
+    ),
+]
+
+
+@pytest.fixture
+def parser(monkeypatch) -> CombinedParser:
+    # Normalization against an empty database
+    monkeypatch.setattr(StringNormalizer, "_get_existing_values", lambda self, t, c: {})
+    monkeypatch.setattr(StringNormalizer, "_load_aliases", lambda self, t, c, values: {})
+    return CombinedParser()
+
+
+def _batch(unchanged: dict) -> pd.DataFrame:
+    """A batch as _get_text_query reads it, unchanged maps a table to its unchanged ids."""
+    df = pd.DataFrame(RAW_ROWS, columns=["id", "raw_summary", "raw_details", "raw_price"])
+    for column in ("summary_hash", "details_hash", "price_hash"):
+        df[column] = "hash"
+    for table in (Car, Details, Price):
+        df[f"{table.__tablename__}_unchanged"] = df["id"].isin(unchanged.get(table, []))
+    return df
+
+
+def test_only_changed_sections_are_parsed_and_validated(parser):
+    df = _batch({Car: [2], Details: [1, 3], Price: [1, 2, 3]})
+
+    parsed = parser._parse(df)
+    parser.validate_parsing(df, parsed)
+
+    ids = {table: sorted(df_section["id"]) for table, df_section in parsed}
+    assert ids == {Car: [1, 3], Details: [2]}
+
+
+def test_batch_without_hash_columns_parses_every_section(parser):
+    df = _batch({}).drop(columns=["car_unchanged", "details_unchanged", "price_unchanged"])
+
+    parsed = parser._parse(df)
+    parser.validate_parsing(df, parsed)
+
+    assert [table for table, _ in parsed] == [Car, Details, Price]
+    assert all(sorted(df_section["id"]) == [1, 2, 3] for _, df_section in parsed)
+
+
+def test_missing_ids_still_fail_validation(parser):
+    df = _batch({Car: [2]})
+
+    parsed = [
+        (table, df_section[df_section["id"] != 1]) for table, df_section in parser._parse(df)
+    ]
+
+    with pytest.raises(ValueError, match="Missing 1 IDs"):
+        parser.validate_parsing(df, parsed)